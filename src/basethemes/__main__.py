@@ -0,0 +1,5 @@
+import sys
+
+from basethemes.cli import main
+
+sys.exit(main())
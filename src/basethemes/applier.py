@@ -14,9 +14,8 @@ import re
 
 from basethemes.terminal_colors import TerminalColor, TerminalColors, Color
 from basethemes.base import BaseTheme
-
-
-DOT_CONFIG = Path("/Users/alex/.config")
+from basethemes import trace
+from basethemes.nvim import write_colorscheme
 
 
 class ThemeApplier:
@@ -34,14 +33,58 @@ class ThemeApplier:
         return None
 
     def read_config(self) -> list[str]:
-        with open(self.config_file, "r") as f:
-            lines = f.readlines()
+        if not trace.tracer.enabled:
+            with open(self.config_file, "r") as f:
+                return f.readlines()
+
+        with trace.span(f"{self.app_name}.read_config", file=self.config_file):
+            with open(self.config_file, "r") as f:
+                lines = f.readlines()
 
         return lines
 
-    def apply_theme(self, theme: BaseTheme) -> None:
+    @classmethod
+    def render(cls, theme: BaseTheme) -> dict[str, str]:
+        """Values of each themed setting, which only depend on the theme"""
+        raise NotImplementedError("Requires implementation by subclass")
+
+    def write_theme(
+        self, theme: BaseTheme, rendered: dict[str, str] | None = None
+    ) -> None:
+        """Rewrites the config, using `rendered` when it's already been rendered
+
+        Writes quietly, as batches write many configs at once. Callers report it.
+        """
+        with trace.span(f"{self.app_name}.write_theme"):
+            if rendered is None:
+                rendered = self.render(theme)
+
+            lines = self.updated_config(rendered)
+
+            with open(self.config_file, "w") as f:
+                f.writelines(lines)
+
+        return None
+
+    def updated_config(self, rendered: dict[str, str]) -> list[str]:
+        """Lines of the config with the themed settings replaced by `rendered`"""
         raise NotImplementedError("Requires implementation by subclass")
 
+    def is_current(self, rendered: dict[str, str]) -> bool:
+        """Whether the themed settings in the config still match `rendered`"""
+        return self.updated_config(rendered) == self.read_config()
+
+    def reload_config(self) -> None:
+        return None
+
+    def apply_theme(self, theme: BaseTheme) -> None:
+        with trace.span(f"{self.app_name}.apply_theme"):
+            self.write_theme(theme)
+            print(f"wrote updated to {self.config_file}")
+            self.reload_config()
+
+        return None
+
 
 @dataclass
 class KittyColorMapping:
@@ -183,21 +226,27 @@ class KittyApplier(ThemeApplier):
 
         return results[0]
 
-    def updated_settings_from_theme(self, theme: KittyTheme) -> dict[int, KittySetting]:
-        theme_settings = theme.to_settings()
-
+    def updated_settings(self, rendered: dict[str, str]) -> dict[int, KittySetting]:
         result: dict[int, KittySetting] = dict()
-        for setting, color in theme_settings.items():
+        for setting, value in rendered.items():
             updated = self.get_setting_by_name(setting).make_updated_setting(
-                is_commented_out=False, value=str(color).lower()
+                is_commented_out=False, value=value
             )
             result[updated.line_no] = updated
 
         return result
 
-    def apply_theme(self, theme: BaseTheme) -> None:
+    @classmethod
+    def render(cls, theme: BaseTheme) -> dict[str, str]:
         kitty_theme = KittyTheme(colors=theme.to_terminal_colors())
-        updated_settings = self.updated_settings_from_theme(kitty_theme)
+
+        return {
+            setting: str(color).lower()
+            for setting, color in kitty_theme.to_settings().items()
+        }
+
+    def updated_config(self, rendered: dict[str, str]) -> list[str]:
+        updated_settings = self.updated_settings(rendered)
 
         lines = []
         for line_no, line in enumerate(self.read_config()):
@@ -205,14 +254,9 @@ class KittyApplier(ThemeApplier):
                 line = updated_settings[line_no].formatted_line
             lines.append(line)
 
-        with open(self.config_file, "w") as f:
-            f.writelines(lines)
-
-        print(f"wrote updated to {self.config_file}")
-        self.reload_config()
-
-        return None
+        return lines
 
+    @trace.traced
     def reload_config(self) -> None:
         kitty_pid = os.getenv("KITTY_PID")
 
@@ -228,30 +272,85 @@ class KittyApplier(ThemeApplier):
         os.kill(kitty_pid, signal.SIGUSR1)
 
 
+# marks the line loading a standalone colorscheme, which basethemes adds and removes
+NVIM_COLORSCHEME_MARKER = "-- basethemes colorscheme"
+
+
 class NeoVimApplier(ThemeApplier):
     app_name = "neovim"
+    colorscheme_dir: Path | None
+
+    def __init__(
+        self, config_file: Path | str, colorscheme_dir: Path | str | None = None
+    ) -> None:
+        """Also writes a standalone colorscheme to `colorscheme_dir` when given
+
+        The colorscheme is named after the theme's lower_name, see basethemes.nvim.
+        The config then loads it from a marked line after the base16 plugin's
+        `base16_theme` variable, which is still kept up to date for the plugin.
+        Without `colorscheme_dir`, a marked line already in the config is kept,
+        so other commands don't switch it back. Delete it to use the plugin.
+        """
+        super().__init__(config_file)
+        if colorscheme_dir is not None:
+            colorscheme_dir = Path(colorscheme_dir)
+
+        self.colorscheme_dir = colorscheme_dir
+
+        return None
+
+    @classmethod
+    def render(cls, theme: BaseTheme) -> dict[str, str]:
+        return {"base16_theme": theme.lower_name}
+
+    def updated_config(self, rendered: dict[str, str]) -> list[str]:
+        name = rendered["base16_theme"]
+        config_lines = self.read_config()
+
+        use_colorscheme = self.colorscheme_dir is not None or any(
+            line.rstrip().endswith(NVIM_COLORSCHEME_MARKER) for line in config_lines
+        )
 
-    def apply_theme(self, theme: BaseTheme) -> None:
         lines = []
         has_updated = False
-        for line in self.read_config():
-            if line.startswith("local base16_theme ="):
-                var, equals, _ = line.partition(" = ")
-                lines.append(f'{var}{equals}"{theme.lower_name}"\n')
-                has_updated = True
+        for line in config_lines:
+            if line.rstrip().endswith(NVIM_COLORSCHEME_MARKER):
+                # re-added below the variable
+                continue
 
-            else:
+            if not line.startswith("local base16_theme ="):
                 lines.append(line)
+                continue
+
+            var, equals, _ = line.partition(" = ")
+            lines.append(f'{var}{equals}"{name}"\n')
+            has_updated = True
+
+            if use_colorscheme:
+                # once plugins are set up, falling back to the plugin if it's missing
+                lines.append(
+                    'vim.api.nvim_create_autocmd("VimEnter", { callback = function() '
+                    f'pcall(vim.cmd.colorscheme, "{name}") end }}) '
+                    f"{NVIM_COLORSCHEME_MARKER}\n"
+                )
 
         if not has_updated:
             raise ValueError(
                 f"Could not find base16_theme variable defined in {self.config_file}"
             )
 
-        with open(self.config_file, "w") as f:
-            f.writelines(lines)
+        return lines
+
+    def write_theme(
+        self, theme: BaseTheme, rendered: dict[str, str] | None = None
+    ) -> None:
+        # written first, so the config never loads a colorscheme that is missing
+        if self.colorscheme_dir is not None and write_colorscheme(
+            theme, self.colorscheme_dir
+        ):
+            print(f"wrote colorscheme to {self.colorscheme_dir}")
 
-        print(f"wrote updated to {self.config_file}")
+        super().write_theme(theme, rendered=rendered)
 
         return None
 
@@ -297,6 +396,7 @@ basic_sketchy_mapping: SketchyBarColorMapping = {
 class SketchyBarApplier(ThemeApplier):
     app_name = "sketchybar"
 
+    @trace.traced
     def reload_config(self) -> None:
         subprocess.run(
             "sketchybar --reload && sleep 1 && sketchybar --update", shell=True
@@ -304,7 +404,14 @@ class SketchyBarApplier(ThemeApplier):
 
         return None
 
-    def apply_theme(self, theme: BaseTheme) -> None:
+    @classmethod
+    def render(cls, theme: BaseTheme) -> dict[str, str]:
+        return {
+            setting: str(theme.palette[base]).lower().removeprefix("#")
+            for setting, base in basic_sketchy_mapping.items()
+        }
+
+    def updated_config(self, rendered: dict[str, str]) -> list[str]:
         config_lines = self.read_config()
 
         SCALAR_SETTINGS = [
@@ -342,12 +449,11 @@ class SketchyBarApplier(ThemeApplier):
                         continue
 
                     setting = f"{in_table_section}_{part}"
-                    base = basic_sketchy_mapping[setting]
 
                     pre, hex, config_value = line.partition("0x")
                     opacity = config_value[:2]
 
-                    new_color = str(theme.palette[base]).lower().removeprefix("#")
+                    new_color = rendered[setting]
                     newline = pre + hex + opacity + new_color + ",\n"
 
                     lines.append(newline)
@@ -363,12 +469,10 @@ class SketchyBarApplier(ThemeApplier):
                     if not stripped.startswith(setting):
                         continue
 
-                    base = basic_sketchy_mapping[setting]
-
                     pre, hex, config_value = line.partition("0x")
                     opacity = config_value[:2]
 
-                    new_color = str(theme.palette[base]).lower().removeprefix("#")
+                    new_color = rendered[setting]
                     newline = pre + hex + opacity + new_color + ",\n"
 
                     lines.append(newline)
@@ -390,23 +494,25 @@ class SketchyBarApplier(ThemeApplier):
                     # append regardless, as not modifying this line
                     lines.append(line)
 
-        with open(self.config_file, "w") as f:
-            f.writelines(lines)
-
-        print(f"wrote updated to {self.config_file}")
-        self.reload_config()
-
-        return None
+        return lines
 
 
 class LazyBordersApplier(ThemeApplier):
     app_name = "lazyborder"
 
+    @trace.traced
     def reload_config(self) -> None:
         subprocess.run(f"{self.config_file.resolve()}", shell=True)
         return None
 
-    def apply_theme(self, theme: BaseTheme) -> None:
+    @classmethod
+    def render(cls, theme: BaseTheme) -> dict[str, str]:
+        return {
+            "active_color": str(theme.palette["base0B"]).lower().removeprefix("#"),
+            "inactive_color": str(theme.palette["base01"]).lower().removeprefix("#"),
+        }
+
+    def updated_config(self, rendered: dict[str, str]) -> list[str]:
         config_lines = self.read_config()
 
         lines = []
@@ -419,12 +525,7 @@ class LazyBordersApplier(ThemeApplier):
                 if not stripped.startswith(setting):
                     continue
 
-                if setting == "active_color":
-                    theme_color = theme.palette["base0B"]
-                else:
-                    theme_color = theme.palette["base01"]
-
-                new_color = str(theme_color).lower().removeprefix("#")
+                new_color = rendered[setting]
 
                 pre, hex, value = line.partition("0x")
                 opacity = value[:2]
@@ -436,10 +537,4 @@ class LazyBordersApplier(ThemeApplier):
             else:
                 lines.append(line)
 
-        with open(self.config_file, "w") as f:
-            f.writelines(lines)
-
-        print(f"wrote updated to {self.config_file}")
-        self.reload_config()
-
-        return None
+        return lines
@@ -1,18 +1,19 @@
 from __future__ import annotations
-from typing import Type, Callable
+from typing import Type, Callable, ClassVar, Mapping
 from pathlib import Path
 from dataclasses import dataclass
 import re
 
-import yaml
 from basethemes.color import Color
 from basethemes.terminal_colors import TerminalColors
+from basethemes import trace
 
 
 @dataclass(frozen=True)
 class BasePalette:
     _bases: dict[str, Color]
     _palette_length: int  # bases should always have _palette_length number of keys
+    _terminal_bases: ClassVar[tuple[int, ...]]
 
     def __init__(self, **kwargs: str | Color) -> None:
         if missing_bases := [
@@ -61,36 +62,27 @@ class BasePalette:
         return self.bases[base_key]
 
     def to_terminal_colors(self) -> TerminalColors:
-        raise NotImplementedError("Requires implementation by subclass")
+        if not hasattr(self, "_terminal_bases"):
+            raise NotImplementedError("Requires implementation by subclass")
+
+        colors = list(self._bases.values())
+        return TerminalColors(*[colors[n] for n in self._terminal_bases])
 
 
 class Base16Palette(BasePalette):
     _palette_length = 16
 
-    def to_terminal_colors(self) -> TerminalColors:
-        return TerminalColors(
-            color0=self[0],
-            color1=self[8],
-            color2=self[11],
-            color3=self[10],
-            color4=self[13],
-            color5=self[14],
-            color6=self[12],
-            color7=self[5],
-            color8=self[3],
-            color9=self[9],
-            color10=self[1],
-            color11=self[2],
-            color12=self[4],
-            color13=self[6],
-            color14=self[15],
-            color15=self[7],
-        )
+    # base index for each of color0-color15
+    _terminal_bases = (0, 8, 11, 10, 13, 14, 12, 5, 3, 9, 1, 2, 4, 6, 15, 7)
 
 
 class Base24Palette(BasePalette):
     _palette_length = 24
 
+    # base index for each of color0-color15, following the base24 styling spec
+    # where base12-base17 are the bright variants of the accent colors
+    _terminal_bases = (0, 8, 11, 10, 13, 14, 12, 6, 2, 18, 20, 19, 22, 23, 21, 7)
+
 
 @dataclass(frozen=True)
 class BaseTheme:
@@ -111,18 +103,11 @@ class BaseTheme:
     @property
     def lower_name(self) -> str:
         """Formats name as lower-case-with-hypens"""
-        # Remove non-alphanumeric characters except spaces
-        clean_string = re.sub(r"[^\w\s]", "", self.name)
-
-        # Replace spaces with hyphens
-        hyphenated_string = re.sub(r"\s+", "-", clean_string)
-        result = hyphenated_string.lower()
-
-        return result
+        return to_lower_name(self.name)
 
 
 class BaseThemes:
-    themes: dict[str, BaseTheme]
+    themes: Mapping[str, BaseTheme]
     palette_type: Type[
         BasePalette
     ]  # TODO: remove palette_type, allow BaseThemes to have themes with different palette_types
@@ -131,7 +116,7 @@ class BaseThemes:
         self,
         palette_type: Type[BasePalette],
         base_dir: Path | None = None,
-        themes: dict[str, BaseTheme] | None = None,
+        themes: Mapping[str, BaseTheme] | None = None,
     ) -> None:
         self.palette_type = palette_type
 
@@ -152,28 +137,19 @@ class BaseThemes:
     def list_theme_names(self) -> list[str]:
         return list(self.themes.keys())
 
+    @trace.traced
     def _init_themes_from_base_dir(self, base_dir: Path) -> None:
         if not base_dir.is_dir:
             raise FileNotFoundError("`base_dir` is required to be a directory")
 
         themes: dict[str, BaseTheme] = dict()
         for theme_file in base_dir.glob("*.yaml"):
-            with open(theme_file, "r") as f:
-                raw_theme = yaml.safe_load(f)
-
-            theme_palette = self.palette_type(**raw_theme["palette"])
-            metadata = {
-                k: v
-                for k, v in raw_theme.items()
-                if k in ["author", "name", "system", "variant", "slug"]
-            }
-
-            theme = BaseTheme(file=theme_file, palette=theme_palette, **metadata)
+            theme = load_theme(theme_file, palette_type=self.palette_type)
 
             if theme.name in themes:
                 raise ValueError(f"Duplicate theme name: {theme.name}")
 
-            themes[metadata["name"]] = theme
+            themes[theme.name] = theme
 
         self.themes = themes
         return None
@@ -206,5 +182,94 @@ class BaseThemes:
         )
 
 
+METADATA_KEYS = ["author", "name", "system", "variant", "slug"]
+
+
+def load_theme(theme_file: Path, palette_type: Type[BasePalette]) -> BaseTheme:
+    # checked first, to not build a span for every theme file while not tracing
+    if not trace.tracer.enabled:
+        return _load_theme(theme_file, palette_type)
+
+    with trace.span("load_theme", file=theme_file):
+        return _load_theme(theme_file, palette_type)
+
+
+def _load_theme(theme_file: Path, palette_type: Type[BasePalette]) -> BaseTheme:
+    # deferred, as yaml is slow to import and not needed by every command
+    import yaml
+
+    with open(theme_file, "r") as f:
+        raw_theme = yaml.safe_load(f)
+
+    theme_palette = palette_type(**raw_theme["palette"])
+    metadata = {k: v for k, v in raw_theme.items() if k in METADATA_KEYS}
+
+    return BaseTheme(file=theme_file, palette=theme_palette, **metadata)
+
+
+def read_theme_metadata(theme_file: Path) -> dict[str, str]:
+    """Reads the top-level metadata of a theme file, without parsing the palette
+
+    Falls back to a full yaml parse for any value that isn't a plain or simply
+    quoted scalar on a single line.
+    """
+    metadata: dict[str, str] = dict()
+    last_key: str | None = None
+
+    with open(theme_file, "r") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+
+            if line[0].isspace():
+                if last_key in METADATA_KEYS:
+                    # value continues over multiple lines
+                    return _read_theme_metadata_yaml(theme_file)
+                continue
+
+            key, sep, value = line.partition(":")
+            last_key = key
+            if not sep or key not in METADATA_KEYS:
+                continue
+
+            value = value.strip()
+            if value[:1] in ("'", '"'):
+                quote = value[0]
+                if len(value) < 2 or not value.endswith(quote):
+                    return _read_theme_metadata_yaml(theme_file)
+
+                value = value[1:-1]
+                if quote in value or "\\" in value:
+                    return _read_theme_metadata_yaml(theme_file)
+
+            elif not value or value[0] in "&*!|>[{%@`" or " #" in value:
+                return _read_theme_metadata_yaml(theme_file)
+
+            metadata[key] = value
+
+    return metadata
+
+
+def _read_theme_metadata_yaml(theme_file: Path) -> dict[str, str]:
+    import yaml
+
+    with open(theme_file, "r") as f:
+        raw_theme = yaml.safe_load(f)
+
+    return {k: v for k, v in raw_theme.items() if k in METADATA_KEYS}
+
+
+def to_lower_name(name: str) -> str:
+    """Formats name as lower-case-with-hypens"""
+    # Remove non-alphanumeric characters except spaces
+    clean_string = re.sub(r"[^\w\s]", "", name)
+
+    # Replace spaces with hyphens
+    hyphenated_string = re.sub(r"\s+", "-", clean_string)
+    result = hyphenated_string.lower()
+
+    return result
+
+
 def int_to_base_key(n: int) -> str:
     return format(n, "x").upper().zfill(2)
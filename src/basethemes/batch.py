@@ -0,0 +1,111 @@
+"""Applying a theme to many config roots at once, e.g. every home directory
+
+Each app's settings are rendered once from the theme, and shared by every
+root. Roots are written concurrently on a bounded pool, and failures are
+collected per root and app rather than stopping the whole batch.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+
+from basethemes import trace
+from basethemes.applier import ThemeApplier
+from basethemes.base import BaseTheme
+from basethemes.foo import APPLIER_CONFIGS
+
+MAX_WORKERS = 8
+
+# rendered settings of each app, keyed by its relative config file
+Rendered = dict[str, dict[str, str]]
+
+
+def make_executor(max_workers: int, use_processes: bool) -> concurrent.futures.Executor:
+    # the executors are imported lazily by concurrent.futures, keeping cli startup fast
+    if use_processes:
+        return concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+
+    return concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+
+@dataclass
+class RootResult:
+    config_root: Path
+    duration: float = 0.0  # seconds
+    errors: dict[str, Exception] = field(default_factory=dict)  # by app name
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def render_all(
+    theme: BaseTheme,
+    applier_configs: list[tuple[type[ThemeApplier], str]] = APPLIER_CONFIGS,
+) -> Rendered:
+    return {
+        config_file: applier_type.render(theme)
+        for applier_type, config_file in applier_configs
+    }
+
+
+def apply_to_root(
+    theme: BaseTheme,
+    rendered: Rendered,
+    config_root: Path,
+    reload: bool = False,
+    applier_configs: list[tuple[type[ThemeApplier], str]] = APPLIER_CONFIGS,
+) -> RootResult:
+    """Applies the theme to each app under `config_root`, recording any errors"""
+    result = RootResult(config_root=config_root)
+    start = time.perf_counter()
+
+    with trace.span("batch.apply_to_root", config_root=config_root):
+        for applier_type, config_file in applier_configs:
+            try:
+                applier = applier_type(config_file=config_root / config_file)
+                applier.write_theme(theme, rendered=rendered[config_file])
+
+                if reload:
+                    applier.reload_config()
+
+            except Exception as e:
+                result.errors[applier_type.app_name] = e
+
+    result.duration = time.perf_counter() - start
+    return result
+
+
+def apply_to_roots(
+    theme: BaseTheme,
+    config_roots: Iterable[Path | str],
+    max_workers: int = MAX_WORKERS,
+    use_processes: bool = False,
+    reload: bool = False,
+    applier_configs: list[tuple[type[ThemeApplier], str]] = APPLIER_CONFIGS,
+) -> list[RootResult]:
+    """Applies the theme to every root concurrently, in the order given
+
+    Reloading is off by default, as the reloads only reach apps running in the
+    current session.
+    """
+    rendered = render_all(theme, applier_configs)
+
+    with make_executor(max_workers, use_processes) as executor:
+        futures = [
+            executor.submit(
+                apply_to_root,
+                theme,
+                rendered,
+                Path(config_root),
+                reload,
+                applier_configs,
+            )
+            for config_root in config_roots
+        ]
+
+        return [future.result() for future in futures]
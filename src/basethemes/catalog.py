@@ -0,0 +1,252 @@
+"""Flat binary export of a theme collection, for sharing via mmap
+
+Layout, with all integers stored as little-endian uint32:
+
+    header         magic, version, theme count, palette length, string count,
+                   and the offsets of the three blocks below
+    colors         theme count * palette length packed 0xRRGGBB colors
+    index          theme count * one string id per field in `FIELDS`
+    string table   string count + 1 byte offsets, followed by the utf-8 bytes
+
+Opening a catalog maps the file read-only, so every process that opens it
+shares the same physical pages and nothing is parsed up front. Themes are only
+materialized into `BaseTheme` objects when they are looked up.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Iterator, Mapping, Type
+
+from basethemes.base import (
+    Base16Palette,
+    Base24Palette,
+    BasePalette,
+    BaseTheme,
+    BaseThemes,
+    int_to_base_key,
+)
+from basethemes.color import Color
+
+MAGIC = b"BTCT"
+VERSION = 1
+
+HEADER = struct.Struct("<4sIIIIIII")
+FIELDS = ("name", "author", "system", "variant", "slug", "file")
+MISSING = 0xFFFFFFFF  # string id for fields that aren't set, e.g. slug
+
+PALETTE_TYPES: dict[int, Type[BasePalette]] = {
+    16: Base16Palette,
+    24: Base24Palette,
+}
+
+
+def write_catalog(base_themes: BaseThemes, path: Path | str) -> None:
+    """Writes the catalog, replacing any existing file atomically
+
+    Processes that already have the old catalog mapped keep reading it until
+    they re-open.
+    """
+    path = Path(path)
+    palette_length = base_themes.palette_type._palette_length
+    themes = list(base_themes.themes.values())
+
+    strings: dict[str, int] = dict()
+    index = array("I")
+    colors = array("I")
+
+    for theme in themes:
+        if len(theme.palette) != palette_length:
+            raise ValueError(
+                f"{theme.name} has {len(theme.palette)} colors, expected {palette_length}"
+            )
+
+        colors.extend(int(color) for color in theme.palette.bases.values())
+
+        for field in FIELDS:
+            value = getattr(theme, field)
+            if value is None:
+                index.append(MISSING)
+                continue
+
+            index.append(strings.setdefault(str(value), len(strings)))
+
+    encoded = [string.encode() for string in strings]
+    string_offsets = array("I", [0])
+    for string in encoded:
+        string_offsets.append(string_offsets[-1] + len(string))
+
+    if sys.byteorder != "little":
+        for block in (colors, index, string_offsets):
+            block.byteswap()
+
+    colors_offset = HEADER.size
+    index_offset = colors_offset + len(colors) * colors.itemsize
+    strings_offset = index_offset + len(index) * index.itemsize
+
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        len(themes),
+        palette_length,
+        len(strings),
+        colors_offset,
+        index_offset,
+        strings_offset,
+    )
+
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        colors.tofile(f)
+        index.tofile(f)
+        string_offsets.tofile(f)
+        f.writelines(encoded)
+
+    os.replace(tmp_path, path)
+
+    return None
+
+
+class Catalog(Mapping[str, BaseTheme]):
+    """Read-only view of a catalog file, mapping theme names to themes"""
+
+    path: Path
+    palette_type: Type[BasePalette]
+
+    def __init__(self, path: Path | str) -> None:
+        if sys.byteorder != "little":
+            raise NotImplementedError("Catalogs can only be mapped on little-endian")
+
+        self.path = Path(path)
+
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._buffer = memoryview(self._mmap)
+        (
+            magic,
+            version,
+            self._count,
+            self._palette_length,
+            num_strings,
+            colors_offset,
+            index_offset,
+            strings_offset,
+        ) = HEADER.unpack_from(self._buffer)
+
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a theme catalog")
+
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"Unsupported catalog version: {version}")
+
+        if self._palette_length not in PALETTE_TYPES:
+            self.close()
+            raise ValueError(f"Unsupported palette length: {self._palette_length}")
+
+        self.palette_type = PALETTE_TYPES[self._palette_length]
+
+        blob_offset = strings_offset + (num_strings + 1) * 4
+        self._colors = self._buffer[colors_offset:index_offset].cast("I")
+        self._index = self._buffer[index_offset:strings_offset].cast("I")
+        self._string_offsets = self._buffer[strings_offset:blob_offset].cast("I")
+        self._strings = self._buffer[blob_offset:]
+
+        self._names: dict[str, int] | None = None
+        self._themes: dict[int, BaseTheme] = dict()
+
+        return None
+
+    def close(self) -> None:
+        # views need to be released before the map can be closed
+        for view in ("_colors", "_index", "_string_offsets", "_strings", "_buffer"):
+            if hasattr(self, view):
+                getattr(self, view).release()
+
+        self._mmap.close()
+        return None
+
+    def __enter__(self) -> Catalog:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __getitem__(self, key: str) -> BaseTheme:
+        return self.theme(self.names[key])
+
+    @property
+    def names(self) -> dict[str, int]:
+        """Theme names, mapped to their position in the catalog"""
+        if self._names is None:
+            self._names = {self.field(n, "name"): n for n in range(self._count)}
+
+        return self._names
+
+    @property
+    def colors(self) -> memoryview:
+        """Every palette as one flat block of packed 0xRRGGBB colors"""
+        return self._colors
+
+    def palette_colors(self, n: int) -> memoryview:
+        start = n * self._palette_length
+        return self._colors[start : start + self._palette_length]
+
+    def string(self, string_id: int) -> str:
+        start, end = self._string_offsets[string_id : string_id + 2]
+        return str(self._strings[start:end], "utf-8")
+
+    def field(self, n: int, field: str) -> str | None:
+        if not (0 <= n < self._count):
+            raise IndexError(f"Theme index out of range (0-{self._count - 1})")
+
+        string_id = self._index[n * len(FIELDS) + FIELDS.index(field)]
+        if string_id == MISSING:
+            return None
+
+        return self.string(string_id)
+
+    def theme(self, n: int) -> BaseTheme:
+        """Materializes the theme at position `n`, caching the result"""
+        if n not in self._themes:
+            self._themes[n] = self._read_theme(n)
+
+        return self._themes[n]
+
+    def iter_themes(self) -> Iterator[BaseTheme]:
+        """Materializes every theme in order, without caching them"""
+        for n in range(self._count):
+            yield self._themes.get(n) or self._read_theme(n)
+
+    def _read_theme(self, n: int) -> BaseTheme:
+        palette = self.palette_type(
+            **{
+                f"base{int_to_base_key(i)}": Color.from_int(value)
+                for i, value in enumerate(self.palette_colors(n))
+            }
+        )
+        metadata = {field: self.field(n, field) for field in FIELDS}
+
+        return BaseTheme(
+            file=Path(metadata.pop("file")),
+            palette=palette,
+            **metadata,
+        )
+
+    def to_base_themes(self) -> BaseThemes:
+        """Themes are materialized as they are accessed from the collection"""
+        return BaseThemes(palette_type=self.palette_type, themes=self)
@@ -0,0 +1,645 @@
+"""Command line interface for listing, searching and applying themes
+
+GitPython and PyYAML are only imported by the commands that need them, so that
+`basethemes apply` starts quickly enough to be bound to hotkeys and login
+scripts. Listing and searching only read the metadata at the top of each
+theme file, and applying only parses the file of the requested theme.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, Type
+
+from basethemes import trace
+from basethemes.base import (
+    Base16Palette,
+    Base24Palette,
+    BasePalette,
+    BaseTheme,
+    BaseThemes,
+    load_theme,
+    read_theme_metadata,
+    to_lower_name,
+)
+from basethemes.foo import (
+    REPO_DIR,
+    DOT_CONFIG,
+    HISTORY_DIR,
+    CACHE_DIR,
+    THEME_REPO_URL,
+    apply_theme,
+    init_repo,
+)
+from basethemes.batch import MAX_WORKERS, apply_to_roots
+from basethemes.catalog import Catalog, write_catalog
+from basethemes.federation import (
+    Federation,
+    Source,
+    federate,
+    parse_source,
+    source_clone_dir,
+)
+from basethemes.nvim import write_colorschemes
+from basethemes.sync import sync_repo, sync_in_background
+
+UPSTREAM_SOURCE = "upstream"  # name of the scheme repo, merged after every --source
+
+PALETTE_TYPES: dict[str, Type[BasePalette]] = {
+    "base16": Base16Palette,
+    "base24": Base24Palette,
+}
+
+
+def get_themes_dir(repo_dir: Path) -> Path:
+    """Returns the checked out scheme repo, only cloning it if it is missing"""
+    if repo_dir.is_dir():
+        return repo_dir
+
+    repo = init_repo(repo_url=THEME_REPO_URL, clone_dir=repo_dir)
+    return Path(repo.git_dir).parent
+
+
+def iter_metadata(base_dir: Path) -> Iterator[tuple[Path, dict[str, str]]]:
+    for theme_file in sorted(base_dir.glob("*.yaml")):
+        yield theme_file, read_theme_metadata(theme_file)
+
+
+def matches_name(metadata: dict[str, str], name: str) -> bool:
+    theme_name = metadata.get("name", "")
+    return name in (theme_name, to_lower_name(theme_name))
+
+
+def find_theme_file(base_dir: Path, name: str) -> Path:
+    """Finds the file for a theme by its name or lower-case-name
+
+    Theme files are usually named after the theme, so that file is checked first
+    before scanning the rest of the directory.
+    """
+    candidate = base_dir / f"{to_lower_name(name)}.yaml"
+    if candidate.is_file() and matches_name(read_theme_metadata(candidate), name):
+        return candidate
+
+    for theme_file, metadata in iter_metadata(base_dir):
+        if matches_name(metadata, name):
+            return theme_file
+
+    raise KeyError(f"Could not find theme {name} in {base_dir}")
+
+
+def find_theme(base_themes: BaseThemes, name: str) -> BaseTheme:
+    for theme in base_themes.themes.values():
+        if name in (theme.name, theme.lower_name):
+            return theme
+
+    raise KeyError(f"Could not find theme {name}")
+
+
+def cmd_apply(args: argparse.Namespace) -> int:
+    try:
+        theme = load_named_theme(args)
+    except KeyError as e:
+        print(e.args[0], file=sys.stderr)
+        return 1
+
+    if args.refresh:
+        # picked up by the next apply, once the new trees have been swapped in
+        for repo_url, repo_dir in repos_to_sync(args):
+            sync_in_background(repo_url, repo_dir)
+
+    base_themes = BaseThemes(
+        palette_type=type(theme.palette), themes={theme.name: theme}
+    )
+    apply_theme(
+        base_themes,
+        theme.name,
+        config_dir=args.config_dir,
+        history_dir=args.history_dir,
+        nvim_colors=args.nvim_colors,
+    )
+
+    return 0
+
+
+def cmd_list(args: argparse.Namespace) -> int:
+    if args.sources:
+        base_themes = load_themes(args).filtered(variant=args.variant)
+        print("\n".join(sorted(base_themes.list_theme_names())))
+        return 0
+
+    base_dir = get_themes_dir(args.repo_dir) / args.system
+
+    names = [
+        metadata["name"]
+        for _, metadata in iter_metadata(base_dir)
+        if args.variant is None or metadata.get("variant") == args.variant
+    ]
+    print("\n".join(sorted(names)))
+
+    return 0
+
+
+def cmd_search(args: argparse.Namespace) -> int:
+    query = args.query.lower()
+
+    if args.sources:
+        all_metadata: Iterable[dict[str, str]] = (
+            {"name": theme.name, "author": theme.author or "", "variant": theme.variant}
+            for theme in load_themes(args).themes.values()
+        )
+    else:
+        base_dir = get_themes_dir(args.repo_dir) / args.system
+        all_metadata = (metadata for _, metadata in iter_metadata(base_dir))
+
+    names = [
+        metadata["name"]
+        for metadata in all_metadata
+        if (args.variant is None or metadata.get("variant") == args.variant)
+        and (
+            query in metadata["name"].lower()
+            or query in metadata.get("author", "").lower()
+        )
+    ]
+    print("\n".join(sorted(names)))
+
+    return 0 if names else 1
+
+
+def federate_sources(args: argparse.Namespace) -> Federation:
+    """Merges the --source dirs and repos, in priority order, over upstream"""
+    sources = [parse_source(value) for value in args.sources]
+    sources.append(
+        Source(name=UPSTREAM_SOURCE, location=str(get_themes_dir(args.repo_dir)))
+    )
+
+    return federate(
+        sources,
+        palette_type=PALETTE_TYPES[args.system],
+        system=args.system,
+        cache_dir=args.cache_dir,
+    )
+
+
+def load_themes(args: argparse.Namespace) -> BaseThemes:
+    """Loads every theme, from a prebuilt catalog or sources if given"""
+    if getattr(args, "catalog", None) is not None:
+        return Catalog(args.catalog).to_base_themes()
+
+    if args.sources:
+        return federate_sources(args).base_themes
+
+    base_dir = get_themes_dir(args.repo_dir) / args.system
+    return BaseThemes(palette_type=PALETTE_TYPES[args.system], base_dir=base_dir)
+
+
+def load_named_theme(args: argparse.Namespace) -> BaseTheme:
+    """Loads the theme named by `args.name`
+
+    Only the theme's own file is parsed, unless a catalog or sources are given.
+    """
+    if args.sources or getattr(args, "catalog", None) is not None:
+        return find_theme(load_themes(args), args.name)
+
+    base_dir = get_themes_dir(args.repo_dir) / args.system
+    return load_theme(find_theme_file(base_dir, args.name), PALETTE_TYPES[args.system])
+
+
+def repos_to_sync(args: argparse.Namespace) -> list[tuple[str, Path]]:
+    """(url, clone dir) of the scheme repo, and of every --source repo"""
+    repos = [(THEME_REPO_URL, args.repo_dir)]
+    for source in map(parse_source, args.sources):
+        if source.is_repo:
+            repos.append((source.location, source_clone_dir(source, args.cache_dir)))
+
+    return repos
+
+
+def cmd_catalog(args: argparse.Namespace) -> int:
+    base_dir = get_themes_dir(args.repo_dir) / args.system
+    base_themes = BaseThemes(palette_type=PALETTE_TYPES[args.system], base_dir=base_dir)
+    write_catalog(base_themes, args.output)
+    print(f"wrote {len(base_themes)} themes to {args.output}")
+
+    return 0
+
+
+def cmd_nvim_colors(args: argparse.Namespace) -> int:
+    written = write_colorschemes(load_themes(args), args.output)
+    print(f"wrote {written} colorschemes to {args.output}")
+
+    return 0
+
+
+def cmd_export(args: argparse.Namespace) -> int:
+    from basethemes.export import export_themes
+
+    written = export_themes(
+        load_themes(args),
+        args.output,
+        format_names=args.formats,
+        max_workers=args.jobs,
+        use_processes=not args.threads,
+    )
+    print(f"wrote {written} files to {args.output}")
+
+    return 0
+
+
+def cmd_match(args: argparse.Namespace) -> int:
+    from basethemes.wallpaper import read_image, match_themes
+
+    pixels = read_image(args.image)
+    matches = match_themes(pixels, load_themes(args), top=args.top)
+
+    for theme, distance in matches:
+        print(f"{distance:8.2f}  {theme.name}")
+
+    if args.apply:
+        if not matches:
+            print("No themes to match against", file=sys.stderr)
+            return 1
+
+        theme, _ = matches[0]
+        base_themes = BaseThemes(
+            palette_type=type(theme.palette), themes={theme.name: theme}
+        )
+        apply_theme(
+            base_themes,
+            theme.name,
+            config_dir=args.config_dir,
+            history_dir=args.history_dir,
+            nvim_colors=args.nvim_colors,
+        )
+
+    return 0
+
+
+def cmd_apply_batch(args: argparse.Namespace) -> int:
+    try:
+        theme = load_named_theme(args)
+    except KeyError as e:
+        print(e.args[0], file=sys.stderr)
+        return 1
+
+    with open(args.roots_file, "r") as f:
+        config_roots = [Path(line.strip()) for line in f if line.strip()]
+
+    results = apply_to_roots(
+        theme, config_roots, max_workers=args.jobs, use_processes=args.processes
+    )
+
+    for result in results:
+        status = "ok" if result.ok else "FAILED"
+        print(f"{status:<6} {result.duration * 1e3:8.1f} ms  {result.config_root}")
+        for app_name, error in result.errors.items():
+            print(f"         {app_name}: {error}")
+
+    failed = sum(not result.ok for result in results)
+    print(f"applied {theme.name} to {len(results) - failed}/{len(results)} roots")
+
+    return 1 if failed else 0
+
+
+def cmd_watch(args: argparse.Namespace) -> int:
+    from basethemes.watch import watch_configs
+
+    try:
+        theme = load_named_theme(args)
+    except KeyError as e:
+        print(e.args[0], file=sys.stderr)
+        return 1
+
+    try:
+        watch_configs(
+            theme,
+            config_dir=args.config_dir,
+            reload=not args.no_reload,
+            debounce=args.debounce,
+        )
+    except OSError as e:
+        # e.g. no configs to watch, or inotify isn't available
+        print(f"could not watch configs: {e}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+def cmd_preview(args: argparse.Namespace) -> int:
+    from basethemes.preview import browse_terminal, preview_sequences, preview_theme
+
+    if args.name is not None:
+        try:
+            theme = load_named_theme(args)
+        except KeyError as e:
+            print(e.args[0], file=sys.stderr)
+            return 1
+
+        preview_theme(theme)
+        return 0
+
+    base_themes = load_themes(args)
+    if args.variant is not None:
+        base_themes = base_themes.filtered(variant=args.variant)
+
+    selected = browse_terminal(preview_sequences(base_themes))
+    if selected is None:
+        return 1
+
+    print(selected)
+    if args.apply:
+        apply_theme(
+            base_themes,
+            selected,
+            config_dir=args.config_dir,
+            history_dir=args.history_dir,
+            nvim_colors=args.nvim_colors,
+        )
+
+    return 0
+
+
+def cmd_sources(args: argparse.Namespace) -> int:
+    federation = federate_sources(args)
+
+    counts = {source_name: 0 for source_name in federation.sources}
+    for source_name in federation.origins.values():
+        counts[source_name] += 1
+
+    for source_name, count in counts.items():
+        cached = " (cached)" if source_name in federation.cached else ""
+        print(f"{count:5}  {source_name}{cached}")
+
+    for name, source_name in federation.shadowed:
+        print(f"shadowed   {name} from {source_name}")
+    for name, source_name, same_as in federation.duplicates:
+        print(f"duplicate  {name} from {source_name}, same palette as {same_as}")
+
+    return 0
+
+
+def cmd_history(args: argparse.Namespace) -> int:
+    from basethemes.history import History
+
+    for n, entry in enumerate(reversed(History(args.history_dir).entries()), 1):
+        applied = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.time))
+        print(f"{n:3}  {applied}  {entry.theme_name}")
+
+    return 0
+
+
+def cmd_revert(args: argparse.Namespace) -> int:
+    from basethemes.history import History
+
+    try:
+        errors = History(args.history_dir).revert(
+            steps=args.steps, reload=not args.no_reload
+        )
+    except ValueError as e:
+        print(e.args[0], file=sys.stderr)
+        return 1
+
+    for app_name, error in errors.items():
+        print(f"could not reload {app_name}: {error}", file=sys.stderr)
+
+    return 0
+
+
+def cmd_refresh(args: argparse.Namespace) -> int:
+    for repo_url, repo_dir in repos_to_sync(args):
+        if args.background:
+            sync_in_background(repo_url, repo_dir)
+        elif sync_repo(repo_url, repo_dir):
+            print(f"refreshed {repo_dir}")
+        else:
+            print(f"{repo_dir} is already up to date")
+
+    return 0
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="basethemes", description="Tools for working with base 16/24 themes"
+    )
+    parser.add_argument(
+        "--repo-dir",
+        type=Path,
+        default=REPO_DIR,
+        help="checkout of the scheme repo ($BASETHEMES_REPO_DIR)",
+    )
+    parser.add_argument(
+        "--history-dir",
+        type=Path,
+        default=HISTORY_DIR,
+        help="where applied themes are recorded ($BASETHEMES_HISTORY_DIR)",
+    )
+    parser.add_argument(
+        "--source",
+        dest="sources",
+        action="append",
+        default=[],
+        help="extra scheme dir or git repo, as [name=]location, taking priority "
+        "over upstream in the order given (repeatable)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=CACHE_DIR,
+        help="where sources are cached ($BASETHEMES_CACHE_DIR)",
+    )
+    parser.add_argument(
+        "--trace", type=Path, help="write a Chrome trace of the command to this file"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    apply = commands.add_parser("apply", help="apply a theme to all apps")
+    apply.add_argument("name", help="theme name, or lower-case-name")
+    apply.add_argument(
+        "--refresh",
+        action="store_true",
+        help="update the scheme repo in the background",
+    )
+    apply.set_defaults(func=cmd_apply)
+
+    list_ = commands.add_parser("list", help="list theme names")
+    list_.set_defaults(func=cmd_list)
+
+    search = commands.add_parser("search", help="search theme names and authors")
+    search.add_argument("query")
+    search.set_defaults(func=cmd_search)
+
+    apply_batch = commands.add_parser(
+        "apply-batch", help="apply a theme to many config dirs at once"
+    )
+    apply_batch.add_argument("name", help="theme name, or lower-case-name")
+    apply_batch.add_argument(
+        "roots_file", type=Path, help="file listing one config dir per line"
+    )
+    apply_batch.add_argument(
+        "--jobs", type=int, default=MAX_WORKERS, help="number of concurrent workers"
+    )
+    apply_batch.add_argument(
+        "--processes", action="store_true", help="use processes rather than threads"
+    )
+    apply_batch.set_defaults(func=cmd_apply_batch)
+
+    match = commands.add_parser("match", help="find themes matching an image")
+    match.add_argument("image", type=Path, help="png or ppm image, e.g. a wallpaper")
+    match.add_argument("--top", type=int, default=5, help="number of themes to show")
+    match.add_argument(
+        "--apply", action="store_true", help="apply the closest matching theme"
+    )
+    match.set_defaults(func=cmd_match)
+
+    nvim_colors = commands.add_parser(
+        "nvim-colors", help="write standalone neovim colorschemes for every theme"
+    )
+    nvim_colors.add_argument("output", type=Path, help="neovim colors dir")
+    nvim_colors.set_defaults(func=cmd_nvim_colors)
+
+    export = commands.add_parser(
+        "export", help="export every theme to other apps' theme formats"
+    )
+    export.add_argument(
+        "output", type=Path, help="directory, or .tar, .tar.gz or .zip archive"
+    )
+    export.add_argument(
+        "--format",
+        dest="formats",
+        action="append",
+        help="format to export, e.g. alacritty (repeatable, defaults to all)",
+    )
+    export.add_argument(
+        "--jobs", type=int, default=MAX_WORKERS, help="number of concurrent workers"
+    )
+    export.add_argument(
+        "--threads", action="store_true", help="use threads rather than processes"
+    )
+    export.set_defaults(func=cmd_export)
+
+    preview = commands.add_parser(
+        "preview", help="preview themes in the terminal without applying them"
+    )
+    preview.add_argument(
+        "name",
+        nargs="?",
+        help="theme to preview, otherwise browse every theme with j/k or arrows",
+    )
+    preview.add_argument(
+        "--apply", action="store_true", help="apply the theme selected with enter"
+    )
+    preview.set_defaults(func=cmd_preview)
+
+    sources = commands.add_parser(
+        "sources", help="show how themes from each --source were merged"
+    )
+    sources.set_defaults(func=cmd_sources)
+
+    watch = commands.add_parser(
+        "watch", help="keep a theme applied when app configs are overwritten"
+    )
+    watch.add_argument("name", help="theme name, or lower-case-name")
+    watch.add_argument(
+        "--debounce",
+        type=float,
+        default=0.25,
+        help="seconds to wait for changes to settle",
+    )
+    watch.add_argument(
+        "--no-reload", action="store_true", help="don't reload apps after re-applying"
+    )
+    watch.set_defaults(func=cmd_watch)
+
+    catalog = commands.add_parser("catalog", help="build a binary catalog file")
+    catalog.add_argument("output", type=Path)
+    catalog.set_defaults(func=cmd_catalog)
+
+    for command in [
+        apply,
+        apply_batch,
+        list_,
+        search,
+        match,
+        nvim_colors,
+        export,
+        watch,
+        preview,
+        sources,
+        catalog,
+    ]:
+        command.add_argument("--system", choices=PALETTE_TYPES, default="base16")
+
+    for command in [match, nvim_colors, export, preview]:
+        command.add_argument(
+            "--catalog", type=Path, help="catalog file to load themes from"
+        )
+
+    for command in [apply, match, watch, preview]:
+        command.add_argument(
+            "--config-dir",
+            type=Path,
+            default=DOT_CONFIG,
+            help="directory containing app configs ($BASETHEMES_CONFIG_DIR)",
+        )
+
+    for command in [apply, match, preview]:
+        command.add_argument(
+            "--nvim-colors",
+            type=Path,
+            help="write a standalone neovim colorscheme to this colors dir, and load "
+            "it from the neovim config",
+        )
+
+    for command in [list_, search, preview]:
+        command.add_argument("--variant", choices=["dark", "light"])
+
+    history = commands.add_parser("history", help="list applied themes, newest first")
+    history.set_defaults(func=cmd_history)
+
+    revert = commands.add_parser(
+        "revert", help="restore the app configs from before recent applies"
+    )
+    revert.add_argument(
+        "--steps", type=int, default=1, help="number of applies to undo"
+    )
+    revert.add_argument(
+        "--no-reload", action="store_true", help="don't reload apps after reverting"
+    )
+    revert.set_defaults(func=cmd_revert)
+
+    refresh = commands.add_parser(
+        "refresh", help="update the scheme repo, and any --source repos"
+    )
+    refresh.add_argument(
+        "--background", action="store_true", help="sync in a detached process"
+    )
+    refresh.set_defaults(func=cmd_refresh)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = make_parser().parse_args(argv)
+
+    names = [parse_source(value).name for value in args.sources]
+    if UPSTREAM_SOURCE in names or len(set(names)) != len(names):
+        print(
+            f"--source names must be unique, and not {UPSTREAM_SOURCE}: {names}",
+            file=sys.stderr,
+        )
+        return 1
+
+    if args.trace:
+        trace.enable()
+
+    try:
+        return args.func(args)
+    finally:
+        if args.trace:
+            trace.export(args.trace)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
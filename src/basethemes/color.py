@@ -22,6 +22,19 @@ class Color:
         self.hex = hex
         return None
 
+    @classmethod
+    def from_int(cls, value: int) -> Color:
+        """From a packed 0xRRGGBB integer, skipping hex validation"""
+        if not (0 <= value <= 0xFFFFFF):
+            raise ValueError(f"color out of range: {value:#x}")
+
+        color = cls.__new__(cls)
+        color.hex = format(value, "06X")
+        return color
+
+    def __int__(self) -> int:
+        return int(self.hex, 16)
+
     def __repr__(self) -> str:
         return f"{type(self).__name__}('#{self.hex})'"
 
@@ -0,0 +1,462 @@
+"""Exporting every theme in a collection to other apps' theme formats
+
+Formats are text templates with `{{ key }}` placeholders, compiled once into
+their literal parts and fields. Each theme is turned into a single context of
+its bases, terminal colors and the kitty mapping's derived colors (background,
+cursor and so on), and every format is rendered from that context.
+
+Colors are formatted with an optional suffix, e.g. for base08 = #ab4642:
+
+    {{ base08 }}      #ab4642
+    {{ base08.hex }}  ab4642
+    {{ base08.r }}    171       (also .g and .b)
+    {{ base08.rf }}   0.670588  (also .gf and .bf, for float color components)
+
+Themes are rendered in chunks on a pool of processes, with a bounded number of
+chunks in flight. Files are written as each chunk finishes, either to a
+directory or streamed into a single tar or zip archive, so the whole export is
+never held in memory.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import io
+import json
+import re
+import tarfile
+import zipfile
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Mapping
+from xml.sax.saxutils import escape as xml_escape
+
+from basethemes import trace
+from basethemes.applier import KittyColorMapping, KittyTheme, basic_kitty_mapping
+from basethemes.base import BaseTheme, BaseThemes
+from basethemes.batch import MAX_WORKERS, make_executor
+from basethemes.catalog import Catalog
+from basethemes.color import Color
+
+CHUNK_SIZE = 32  # themes rendered per task
+
+PLACEHOLDER = re.compile(r"\{\{\s*(\w+)(?:\.(\w+))?\s*\}\}")
+
+COLOR_FORMATTERS: dict[str, Callable[[Color], str]] = {
+    "": lambda color: f"#{color.hex.lower()}",
+    "hex": lambda color: color.hex.lower(),
+    "r": lambda color: str(int(color.red, 16)),
+    "g": lambda color: str(int(color.green, 16)),
+    "b": lambda color: str(int(color.blue, 16)),
+    "rf": lambda color: f"{int(color.red, 16) / 255:.6f}",
+    "gf": lambda color: f"{int(color.green, 16) / 255:.6f}",
+    "bf": lambda color: f"{int(color.blue, 16) / 255:.6f}",
+}
+
+Context = Mapping[str, "Color | str"]
+
+
+@dataclass(frozen=True)
+class Template:
+    literals: tuple[str, ...]  # one more than there are fields
+    fields: tuple[tuple[str, str], ...]  # (context key, color formatter)
+
+    def render(self, context: Context, escape: Callable[[str], str]) -> str:
+        parts = [self.literals[0]]
+        for (key, formatter), literal in zip(self.fields, self.literals[1:]):
+            value = context[key]
+            if isinstance(value, Color):
+                parts.append(COLOR_FORMATTERS[formatter](value))
+            elif formatter:
+                raise ValueError(f"Can't format {key} as a color: {value!r}")
+            else:
+                parts.append(escape(value))
+            parts.append(literal)
+
+        return "".join(parts)
+
+
+def compile_template(source: str) -> Template:
+    literals, fields = [], []
+    position = 0
+    for match in PLACEHOLDER.finditer(source):
+        key, formatter = match.group(1), match.group(2) or ""
+        if formatter not in COLOR_FORMATTERS:
+            raise ValueError(f"Unknown color format {formatter!r} in {match.group()}")
+
+        literals.append(source[position : match.start()])
+        fields.append((key, formatter))
+        position = match.end()
+
+    literals.append(source[position:])
+    return Template(literals=tuple(literals), fields=tuple(fields))
+
+
+def escape_text(value: str) -> str:
+    return value.replace("\n", " ")
+
+
+def escape_json(value: str) -> str:
+    """Escapes a value inside a json (or toml basic) string"""
+    return json.dumps(value)[1:-1]
+
+
+def escape_xml(value: str) -> str:
+    return xml_escape(value)
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    name: str
+    extension: str
+    template: Template
+    escape: Callable[[str], str] = escape_text
+
+    def render(self, context: Context) -> str:
+        return self.template.render(context, self.escape)
+
+    def file_name(self, theme: BaseTheme) -> str:
+        return f"{self.name}/{theme.lower_name}.{self.extension}"
+
+
+def theme_context(
+    theme: BaseTheme, mapping: KittyColorMapping = basic_kitty_mapping
+) -> dict[str, Color | str]:
+    """Every value available to templates, for one theme"""
+    kitty_theme = KittyTheme(colors=theme.to_terminal_colors(), mapping=mapping)
+
+    context: dict[str, Color | str] = {
+        "name": theme.name,
+        "lower_name": theme.lower_name,
+        "author": theme.author,
+        "system": theme.system,
+        "variant": theme.variant,
+    }
+    context.update({f"base{key}": color for key, color in theme.palette.bases.items()})
+    context.update(kitty_theme.to_settings())
+
+    return context
+
+
+def _each(line: str, items: Iterable[tuple[str, str]]) -> str:
+    """Repeats `line` for each (name, key) pair, filling in $name and $key"""
+    return "".join(
+        line.replace("$name", name).replace("$key", key) for name, key in items
+    )
+
+
+TERMINAL_KEYS = [f"color{n}" for n in range(16)]
+ANSI_NAMES = ["black", "red", "green", "yellow", "blue", "magenta", "cyan", "white"]
+
+ALACRITTY = (
+    """# {{ name }} by {{ author }}, generated by basethemes
+
+[colors.primary]
+background = "{{ background }}"
+foreground = "{{ foreground }}"
+
+[colors.cursor]
+text = "{{ background }}"
+cursor = "{{ cursor }}"
+
+[colors.selection]
+text = "{{ selection_foreground }}"
+background = "{{ selection_background }}"
+
+[colors.normal]
+"""
+    + _each('$name = "{{ $key }}"\n', zip(ANSI_NAMES, TERMINAL_KEYS[:8]))
+    + "\n[colors.bright]\n"
+    + _each('$name = "{{ $key }}"\n', zip(ANSI_NAMES, TERMINAL_KEYS[8:]))
+)
+
+WEZTERM = """[colors]
+foreground = "{{ foreground }}"
+background = "{{ background }}"
+cursor_bg = "{{ cursor }}"
+cursor_border = "{{ cursor }}"
+cursor_fg = "{{ background }}"
+selection_bg = "{{ selection_background }}"
+selection_fg = "{{ selection_foreground }}"
+ansi = [%s]
+brights = [%s]
+
+[metadata]
+name = "{{ name }}"
+author = "{{ author }}"
+""" % (
+    ", ".join('"{{ %s }}"' % key for key in TERMINAL_KEYS[:8]),
+    ", ".join('"{{ %s }}"' % key for key in TERMINAL_KEYS[8:]),
+)
+
+XRESOURCES = """! {{ name }} by {{ author }}, generated by basethemes
+*.foreground: {{ foreground }}
+*.background: {{ background }}
+*.cursorColor: {{ cursor }}
+""" + _each("*.$name: {{ $key }}\n", zip(TERMINAL_KEYS, TERMINAL_KEYS))
+
+ITERM2_COLOR = """\t<key>$name</key>
+\t<dict>
+\t\t<key>Color Space</key>
+\t\t<string>sRGB</string>
+\t\t<key>Red Component</key>
+\t\t<real>{{ $key.rf }}</real>
+\t\t<key>Green Component</key>
+\t\t<real>{{ $key.gf }}</real>
+\t\t<key>Blue Component</key>
+\t\t<real>{{ $key.bf }}</real>
+\t</dict>
+"""
+
+ITERM2 = (
+    """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
+<plist version="1.0">
+<dict>
+"""
+    + _each(ITERM2_COLOR, [(f"Ansi {n} Color", f"color{n}") for n in range(16)])
+    + _each(
+        ITERM2_COLOR,
+        [
+            ("Background Color", "background"),
+            ("Foreground Color", "foreground"),
+            ("Cursor Color", "cursor"),
+            ("Cursor Text Color", "background"),
+            ("Selection Color", "selection_background"),
+            ("Selected Text Color", "selection_foreground"),
+            ("Link Color", "url_color"),
+        ],
+    )
+    + "</dict>\n</plist>\n"
+)
+
+VSCODE_ANSI = ["Black", "Red", "Green", "Yellow", "Blue", "Magenta", "Cyan", "White"]
+
+VSCODE = (
+    """{
+  "name": "{{ name }}",
+  "type": "{{ variant }}",
+  "colors": {
+    "editor.background": "{{ base00 }}",
+    "editor.foreground": "{{ base05 }}",
+    "editor.lineHighlightBackground": "{{ base01 }}",
+    "editor.selectionBackground": "{{ base02 }}",
+    "editorCursor.foreground": "{{ base05 }}",
+    "editorLineNumber.foreground": "{{ base03 }}",
+    "editorLineNumber.activeForeground": "{{ base04 }}",
+    "sideBar.background": "{{ base01 }}",
+    "statusBar.background": "{{ base01 }}",
+    "statusBar.foreground": "{{ base04 }}",
+    "activityBar.background": "{{ base01 }}",
+    "titleBar.activeBackground": "{{ base01 }}",
+    "tab.activeBackground": "{{ base00 }}",
+    "tab.inactiveBackground": "{{ base01 }}",
+"""
+    + _each(
+        '    "terminal.ansi$name": "{{ $key }}",\n', zip(VSCODE_ANSI, TERMINAL_KEYS)
+    )
+    + _each(
+        '    "terminal.ansiBright$name": "{{ $key }}",\n',
+        zip(VSCODE_ANSI, TERMINAL_KEYS[8:]),
+    )
+    + """    "terminal.background": "{{ background }}",
+    "terminal.foreground": "{{ foreground }}"
+  },
+  "tokenColors": [
+    { "scope": "comment", "settings": { "foreground": "{{ base03 }}", "fontStyle": "italic" } },
+    { "scope": "string", "settings": { "foreground": "{{ base0B }}" } },
+    { "scope": "constant", "settings": { "foreground": "{{ base09 }}" } },
+    { "scope": "variable", "settings": { "foreground": "{{ base08 }}" } },
+    { "scope": "keyword", "settings": { "foreground": "{{ base0E }}" } },
+    { "scope": "entity.name.function", "settings": { "foreground": "{{ base0D }}" } },
+    { "scope": "entity.name.type", "settings": { "foreground": "{{ base0A }}" } },
+    { "scope": "support", "settings": { "foreground": "{{ base0C }}" } }
+  ]
+}
+"""
+)
+
+BASE16_KEYS = [f"base0{k}" for k in "0123456789ABCDEF"]
+
+CSS = (
+    "/* {{ name }} by {{ author }}, generated by basethemes */\n:root {\n"
+    + _each("  --$name: {{ $key }};\n", zip(BASE16_KEYS, BASE16_KEYS))
+    + _each("  --$name: {{ $key }};\n", zip(TERMINAL_KEYS, TERMINAL_KEYS))
+    + "  --background: {{ background }};\n"
+    + "  --foreground: {{ foreground }};\n"
+    + "}\n"
+)
+
+KITTY_KEYS = list(basic_kitty_mapping.__dict__) + TERMINAL_KEYS
+
+KITTY = "# {{ name }} by {{ author }}, generated by basethemes\n" + _each(
+    "$name {{ $key }}\n", zip(KITTY_KEYS, KITTY_KEYS)
+)
+
+FORMATS: dict[str, ExportFormat] = {
+    export_format.name: export_format
+    for export_format in [
+        ExportFormat("alacritty", "toml", compile_template(ALACRITTY), escape_json),
+        ExportFormat("wezterm", "toml", compile_template(WEZTERM), escape_json),
+        ExportFormat("xresources", "Xresources", compile_template(XRESOURCES)),
+        ExportFormat("iterm2", "itermcolors", compile_template(ITERM2), escape_xml),
+        ExportFormat("vscode", "json", compile_template(VSCODE), escape_json),
+        ExportFormat("css", "css", compile_template(CSS)),
+        ExportFormat("kitty", "conf", compile_template(KITTY)),
+    ]
+}
+
+
+def render_themes(
+    themes: list[BaseTheme], format_names: list[str]
+) -> list[tuple[str, bytes]]:
+    """Renders each theme in every format, as (file name, contents) pairs
+
+    Formats are looked up by name, so only the names are sent to workers.
+    """
+    formats = [FORMATS[name] for name in format_names]
+
+    files = []
+    for theme in themes:
+        context = theme_context(theme)
+        for export_format in formats:
+            files.append(
+                (
+                    export_format.file_name(theme),
+                    export_format.render(context).encode(),
+                )
+            )
+
+    return files
+
+
+class ExportSink:
+    """Somewhere to write exported files, one at a time"""
+
+    def write(self, name: str, data: bytes) -> None:
+        raise NotImplementedError("Requires implementation by subclass")
+
+    def close(self) -> None:
+        return None
+
+    def __enter__(self) -> ExportSink:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+        return None
+
+
+class DirectorySink(ExportSink):
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        return None
+
+    def write(self, name: str, data: bytes) -> None:
+        path = self.directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+        return None
+
+
+class TarSink(ExportSink):
+    def __init__(self, path: Path) -> None:
+        # "w|*" streams the archive out, without seeking back
+        mode = "w|gz" if path.name.endswith((".tar.gz", ".tgz")) else "w|"
+        self.archive = tarfile.open(str(path), mode)
+        return None
+
+    def write(self, name: str, data: bytes) -> None:
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        self.archive.addfile(info, io.BytesIO(data))
+
+        return None
+
+    def close(self) -> None:
+        self.archive.close()
+        return None
+
+
+class ZipSink(ExportSink):
+    def __init__(self, path: Path) -> None:
+        self.archive = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+        return None
+
+    def write(self, name: str, data: bytes) -> None:
+        self.archive.writestr(name, data)
+        return None
+
+    def close(self) -> None:
+        self.archive.close()
+        return None
+
+
+def open_sink(output: Path) -> ExportSink:
+    """An archive for .tar, .tar.gz, .tgz and .zip outputs, otherwise a directory"""
+    if output.name.endswith((".tar", ".tar.gz", ".tgz")):
+        return TarSink(output)
+
+    if output.suffix == ".zip":
+        return ZipSink(output)
+
+    return DirectorySink(output)
+
+
+def _chunks(themes: Iterable[BaseTheme], size: int) -> Iterator[list[BaseTheme]]:
+    iterator = iter(themes)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+@trace.traced
+def export_themes(
+    base_themes: BaseThemes,
+    output: Path | str,
+    format_names: list[str] | None = None,
+    max_workers: int = MAX_WORKERS,
+    use_processes: bool = True,
+    chunk_size: int = CHUNK_SIZE,
+) -> int:
+    """Exports every theme in each format, returning the number of files written
+
+    Themes are read lazily from the collection, and at most two chunks per
+    worker are in flight at a time. Themes read from a `Catalog` aren't cached
+    by it, so a large catalog is never held in memory as `BaseTheme` objects.
+    """
+    if format_names is None:
+        format_names = list(FORMATS)
+
+    if unknown := [name for name in format_names if name not in FORMATS]:
+        raise ValueError(f"Unknown export formats: {unknown}")
+
+    if isinstance(base_themes.themes, Catalog):
+        # read without caching, so the catalog is never fully materialized
+        themes: Iterable[BaseTheme] = base_themes.themes.iter_themes()
+    else:
+        themes = base_themes.themes.values()
+
+    written = 0
+    executor = make_executor(max_workers, use_processes)
+    with executor, open_sink(Path(output)) as sink:
+        pending: deque[concurrent.futures.Future] = deque()
+
+        def write_next() -> int:
+            files = pending.popleft().result()
+            for name, data in files:
+                sink.write(name, data)
+
+            return len(files)
+
+        for chunk in _chunks(themes, chunk_size):
+            pending.append(executor.submit(render_themes, chunk, format_names))
+            if len(pending) >= 2 * max_workers:
+                written += write_next()
+
+        while pending:
+            written += write_next()
+
+    return written
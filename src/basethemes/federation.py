@@ -0,0 +1,177 @@
+"""Loading themes from several sources at once, e.g. in-house and upstream schemes
+
+Each source is a local directory or a git repo (cloned with `init_repo`, and
+synced along with the scheme repo by `refresh`), laid out like the upstream
+scheme repo with a directory per system. Sources are loaded concurrently, and
+merged in priority order - the order they are given:
+
+- a theme whose name was already taken by an earlier source is shadowed
+- a theme with the same palette as one already merged is a duplicate, so
+  copies of a scheme under another name only appear once
+
+Every source is cached as a catalog (see basethemes.catalog), keyed by a
+fingerprint of the source: the synced commit for repos, or the size and
+modification time of each scheme file for directories. An unchanged source is
+mapped straight from its cached catalog without parsing any yaml. Clones and
+catalogs are keyed by the source's location, as names are only for display and
+two sources can share one.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import hashlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Type
+
+from basethemes import trace
+from basethemes.base import BasePalette, BaseTheme, BaseThemes
+from basethemes.catalog import Catalog, write_catalog
+from basethemes.foo import CACHE_DIR, init_repo
+from basethemes.sync import current_commit
+
+
+@dataclass(frozen=True)
+class Source:
+    name: str
+    location: str  # local directory, or git repo url
+
+    @property
+    def is_repo(self) -> bool:
+        return "://" in self.location or self.location.startswith("git@")
+
+    @property
+    def location_key(self) -> str:
+        return hashlib.sha1(self.location.encode()).hexdigest()[:16]
+
+
+def parse_source(value: str) -> Source:
+    """From `name=location`, or a location named after its last path component"""
+    name, equals, location = value.partition("=")
+    if equals and "/" not in name:
+        return Source(name=name, location=location)
+
+    name = value.rstrip("/").rpartition("/")[2].removesuffix(".git")
+    return Source(name=name, location=value)
+
+
+@dataclass
+class Federation:
+    base_themes: BaseThemes
+    sources: list[str]  # in priority order
+    origins: dict[str, str]  # source name, by theme name
+    # (theme, source) of themes whose name was taken by an earlier source
+    shadowed: list[tuple[str, str]] = field(default_factory=list)
+    # (theme, source, merged theme with the same palette)
+    duplicates: list[tuple[str, str, str]] = field(default_factory=list)
+    cached: list[str] = field(default_factory=list)  # sources loaded from cache
+
+
+def source_clone_dir(source: Source, cache_dir: Path) -> Path:
+    return cache_dir / "repos" / source.location_key
+
+
+def source_root(source: Source, cache_dir: Path) -> Path:
+    """Directory containing the source's system dirs, cloning repos if missing
+
+    Like the scheme repo, existing clones are only updated by `refresh`.
+    """
+    if not source.is_repo:
+        return Path(source.location).expanduser()
+
+    clone_dir = source_clone_dir(source, cache_dir)
+    init_repo(repo_url=source.location, clone_dir=clone_dir)
+
+    return clone_dir
+
+
+def fingerprint(root: Path, system: str) -> str:
+    """Changes whenever any of the source's scheme files might have"""
+    commit = current_commit(root)
+    if commit is not None:
+        return f"{commit}-{system}"
+
+    digest = hashlib.sha1(system.encode())
+    for theme_file in sorted((root / system).glob("*.yaml")):
+        stat = theme_file.stat()
+        digest.update(f"{theme_file.name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+
+    return digest.hexdigest()
+
+
+@trace.traced
+def load_source(
+    source: Source,
+    palette_type: Type[BasePalette],
+    system: str,
+    cache_dir: Path = CACHE_DIR,
+) -> tuple[Catalog, bool]:
+    """The source's themes, and whether they were loaded from cache"""
+    root = source_root(source, cache_dir)
+    key = hashlib.sha1(fingerprint(root, system).encode()).hexdigest()[:16]
+
+    catalogs_dir = cache_dir / "catalogs"
+    catalog_file = catalogs_dir / f"{source.location_key}.{system}.{key}.catalog"
+    if catalog_file.exists():
+        return Catalog(catalog_file), True
+
+    base_themes = BaseThemes(palette_type=palette_type, base_dir=root / system)
+    catalogs_dir.mkdir(parents=True, exist_ok=True)
+    write_catalog(base_themes, catalog_file)
+
+    # only the latest catalog of each source is kept
+    for stale in catalogs_dir.glob(f"{source.location_key}.{system}.*.catalog"):
+        if stale != catalog_file:
+            stale.unlink(missing_ok=True)
+
+    return Catalog(catalog_file), False
+
+
+@trace.traced
+def federate(
+    sources: list[Source],
+    palette_type: Type[BasePalette],
+    system: str = "base16",
+    cache_dir: Path = CACHE_DIR,
+    dedupe: bool = True,
+) -> Federation:
+    """Loads every source concurrently, and merges them in priority order"""
+    if len({source.name for source in sources}) != len(sources):
+        raise ValueError(f"Source names must be unique: {sources}")
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(sources) or 1) as pool:
+        futures = [
+            pool.submit(load_source, source, palette_type, system, cache_dir)
+            for source in sources
+        ]
+        loaded = [future.result() for future in futures]
+
+    themes: dict[str, BaseTheme] = dict()
+    federation = Federation(
+        base_themes=BaseThemes(palette_type=palette_type, themes=themes),
+        sources=[source.name for source in sources],
+        origins=dict(),
+    )
+    palettes: dict[bytes, str] = dict()  # theme name, by palette colors
+
+    for source, (catalog, cached) in zip(sources, loaded):
+        if cached:
+            federation.cached.append(source.name)
+
+        with catalog:
+            for name, n in catalog.names.items():
+                if name in themes:
+                    federation.shadowed.append((name, source.name))
+                    continue
+
+                palette = catalog.palette_colors(n).tobytes()
+                if dedupe and palette in palettes:
+                    federation.duplicates.append((name, source.name, palettes[palette]))
+                    continue
+
+                themes[name] = catalog.theme(n)
+                federation.origins[name] = source.name
+                palettes[palette] = name
+
+    return federation
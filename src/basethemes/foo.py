@@ -1,54 +1,124 @@
 from __future__ import annotations
-from git import Repo
 from pathlib import Path
 from os import getenv
-import yaml
+from typing import TYPE_CHECKING
 
 from .base import Base16Palette, BaseTheme, BaseThemes, Base24Palette
 from .applier import (
+    ThemeApplier,
     KittyTheme,
     KittyApplier,
     NeoVimApplier,
     SketchyBarApplier,
     LazyBordersApplier,
 )
+from . import trace
+from .sync import sync_repo
+
+if TYPE_CHECKING:
+    from git import Repo
 
 THEME_REPO_URL = "https://github.com/tinted-theming/schemes"
 
-# TODO: via env/config
-REPO_DIR = Path("/Users/alex/repos/tinted-theming")
-DOT_CONFIG = Path("/Users/alex/.config")
+
+def xdg_dir(env_var: str, default: str) -> Path:
+    """An XDG base directory, falling back to its default under the home dir"""
+    return Path(getenv(env_var) or Path.home() / default)
+
+
+REPO_DIR = Path(
+    getenv("BASETHEMES_REPO_DIR")
+    or xdg_dir("XDG_DATA_HOME", ".local/share") / "basethemes/schemes"
+)
+DOT_CONFIG = Path(
+    getenv("BASETHEMES_CONFIG_DIR") or xdg_dir("XDG_CONFIG_HOME", ".config")
+)
+HISTORY_DIR = Path(
+    getenv("BASETHEMES_HISTORY_DIR")
+    or xdg_dir("XDG_STATE_HOME", ".local/state") / "basethemes"
+)
+CACHE_DIR = Path(
+    getenv("BASETHEMES_CACHE_DIR") or xdg_dir("XDG_CACHE_HOME", ".cache") / "basethemes"
+)
 
 DEFAULT_THEME = "Gotham"
 
+# config file of each app relative to the config dir, in the order they're applied
+APPLIER_CONFIGS: list[tuple[type[ThemeApplier], str]] = [
+    (LazyBordersApplier, "borders/bordersrc"),
+    (SketchyBarApplier, "sketchybar/colors.lua"),
+    (NeoVimApplier, "nvim/lua/plugins/base16.lua"),
+    (KittyApplier, "kitty/kitty.conf"),
+]
+
 
+@trace.traced
 def init_repo(repo_url: str, clone_dir: Path) -> Repo:
-    if clone_dir.exists():
-        return Repo(clone_dir)
+    # deferred, as GitPython is slow to import and only needed when syncing
+    from git import Repo
 
-    return Repo.clone_from(repo_url, to_path=clone_dir, depth=1)
+    if not clone_dir.exists():
+        # only checks out the scheme dirs, see basethemes.sync. Waits on any sync
+        # already running, which is what publishes the clone dir
+        sync_repo(repo_url, clone_dir, block=True)
 
+    if not clone_dir.exists():
+        raise FileNotFoundError(f"Could not sync {repo_url} to {clone_dir}")
 
-def apply_theme(base_themes: BaseThemes, theme_name: str) -> None:
-    print(f"applying theme {theme_name}")
+    return Repo(clone_dir)
 
-    theme = base_themes[theme_name]
 
-    # lazyborders
-    lazyborders = LazyBordersApplier(config_file=DOT_CONFIG / "borders/bordersrc")
-    lazyborders.apply_theme(theme)
+@trace.traced
+def apply_theme(
+    base_themes: BaseThemes,
+    theme_name: str,
+    config_dir: Path = DOT_CONFIG,
+    history_dir: Path | None = None,
+    nvim_colors: Path | None = None,
+) -> None:
+    """Applies the theme to every app, recording it in `history_dir` if given
 
-    # sketchybar
-    sketchybar = SketchyBarApplier(config_file=DOT_CONFIG / "sketchybar/colors.lua")
-    sketchybar.apply_theme(theme)
-
-    # neovim
-    nvim = NeoVimApplier(config_file=DOT_CONFIG / "nvim/lua/plugins/base16.lua")
-    nvim.apply_theme(theme)
+    With `nvim_colors`, neovim loads a standalone colorscheme written to that
+    colors dir rather than using the base16 plugin, see NeoVimApplier.
+    """
+    print(f"applying theme {theme_name}")
 
-    # kitty
-    kitty = KittyApplier(config_file=DOT_CONFIG / "kitty/kitty.conf")
-    kitty.apply_theme(theme)
+    theme = base_themes[theme_name]
+    config_files = {
+        applier_type.app_name: config_dir / config_file
+        for applier_type, config_file in APPLIER_CONFIGS
+    }
+
+    if history_dir is not None:
+        # deferred, as basethemes.history imports APPLIER_CONFIGS from here
+        from .history import History
+
+        history = History(history_dir)
+        before = history.snapshot(config_files)
+
+    appliers: list[ThemeApplier] = []
+    try:
+        for applier_type, config_file in APPLIER_CONFIGS:
+            if applier_type is NeoVimApplier:
+                applier = NeoVimApplier(
+                    config_file=config_dir / config_file, colorscheme_dir=nvim_colors
+                )
+            else:
+                applier = applier_type(config_file=config_dir / config_file)
+
+            applier.write_theme(theme)
+            print(f"wrote updated to {applier.config_file}")
+            appliers.append(applier)
+
+    finally:
+        # recorded even if a write fails partway, so the configs already
+        # rewritten can be reverted, and before reloading, which fails
+        # whenever an app isn't running
+        if history_dir is not None:
+            history.record(theme.name, config_files, before)
+
+    for applier in appliers:
+        applier.reload_config()
 
     return None
 
@@ -0,0 +1,251 @@
+"""History of applied themes, for undoing an apply without re-rendering
+
+Every apply records the bytes of each app config from before and after it was
+themed. Contents are stored once per sha256 and zlib compressed, so applying
+the same themes again and again costs no extra disk. Only the last
+`HISTORY_SIZE` applies are kept, and contents no longer referenced by any of
+them are deleted.
+
+Reverting copies the recorded bytes straight back over the configs, without
+parsing them or rendering the theme. Every config is written to a temporary
+file first, and only then are they all renamed into place, so a failure part
+way through leaves the configs untouched. The apps are then reloaded in
+parallel.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from basethemes import trace
+from basethemes.applier import ThemeApplier
+from basethemes.foo import APPLIER_CONFIGS
+
+HISTORY_SIZE = 20
+
+APPLIER_TYPES: dict[str, type[ThemeApplier]] = {
+    applier_type.app_name: applier_type for applier_type, _ in APPLIER_CONFIGS
+}
+
+
+@dataclass(frozen=True)
+class FileChange:
+    path: str  # config file, after resolving symlinks
+    before: str | None  # object ids, None if the file was missing
+    after: str | None
+
+
+@dataclass(frozen=True)
+class HistoryEntry:
+    theme_name: str
+    time: float  # seconds since the epoch
+    files: dict[str, FileChange]  # by app name
+
+    @classmethod
+    def from_dict(cls, entry: dict) -> HistoryEntry:
+        return cls(
+            theme_name=entry["theme_name"],
+            time=entry["time"],
+            files={
+                app_name: FileChange(**change)
+                for app_name, change in entry["files"].items()
+            },
+        )
+
+
+class History:
+    history_dir: Path
+    size: int
+
+    def __init__(self, history_dir: Path | str, size: int = HISTORY_SIZE) -> None:
+        self.history_dir = Path(history_dir)
+        self.size = size
+
+        return None
+
+    @property
+    def objects_dir(self) -> Path:
+        return self.history_dir / "objects"
+
+    @property
+    def log_file(self) -> Path:
+        return self.history_dir / "history.json"
+
+    def entries(self) -> list[HistoryEntry]:
+        """Every recorded apply, oldest first"""
+        try:
+            with open(self.log_file, "r") as f:
+                return [HistoryEntry.from_dict(entry) for entry in json.load(f)]
+        except FileNotFoundError:
+            return []
+
+    def _write_entries(self, entries: list[HistoryEntry]) -> None:
+        self.history_dir.mkdir(parents=True, exist_ok=True)
+        _write_atomic(
+            self.log_file,
+            json.dumps([asdict(entry) for entry in entries], indent=1).encode(),
+        )
+
+        return None
+
+    def store(self, data: bytes) -> str:
+        """Stores the contents unless they already are, returning their id"""
+        object_id = hashlib.sha256(data).hexdigest()
+        path = self.objects_dir / object_id
+
+        if not path.exists():
+            self.objects_dir.mkdir(parents=True, exist_ok=True)
+            _write_atomic(path, zlib.compress(data))
+
+        return object_id
+
+    def load(self, object_id: str) -> bytes:
+        with open(self.objects_dir / object_id, "rb") as f:
+            return zlib.decompress(f.read())
+
+    def snapshot(self, config_files: dict[str, Path]) -> dict[str, str | None]:
+        """Stores the current contents of each app's config"""
+        object_ids: dict[str, str | None] = dict()
+        for app_name, config_file in config_files.items():
+            try:
+                object_ids[app_name] = self.store(config_file.read_bytes())
+            except FileNotFoundError:
+                object_ids[app_name] = None
+
+        return object_ids
+
+    @trace.traced
+    def record(
+        self,
+        theme_name: str,
+        config_files: dict[str, Path],
+        before: dict[str, str | None],
+    ) -> HistoryEntry:
+        """Records an apply, given the snapshot taken before it"""
+        after = self.snapshot(config_files)
+        entry = HistoryEntry(
+            theme_name=theme_name,
+            time=time.time(),
+            files={
+                app_name: FileChange(
+                    path=str(config_file.resolve()),
+                    before=before[app_name],
+                    after=after[app_name],
+                )
+                for app_name, config_file in config_files.items()
+            },
+        )
+
+        entries = self.entries() + [entry]
+        self._write_entries(entries[-self.size :])
+        if len(entries) > self.size:
+            self.prune(entries[-self.size :])
+
+        return entry
+
+    def prune(self, entries: list[HistoryEntry]) -> int:
+        """Deletes contents no longer referenced, returning how many were deleted"""
+        referenced = {
+            object_id
+            for entry in entries
+            for change in entry.files.values()
+            for object_id in (change.before, change.after)
+        }
+
+        deleted = 0
+        for path in self.objects_dir.iterdir():
+            if path.name not in referenced:
+                path.unlink(missing_ok=True)
+                deleted += 1
+
+        return deleted
+
+    @trace.traced
+    def revert(self, steps: int = 1, reload: bool = True) -> dict[str, Exception]:
+        """Restores the configs from before the last `steps` applies
+
+        Returns any errors from reloading, by app name.
+        """
+        entries = self.entries()
+        if not 1 <= steps <= len(entries):
+            raise ValueError(f"Can only revert 1-{len(entries)} steps, got {steps}")
+
+        files = entries[-steps].files
+
+        # stage everything before replacing anything
+        staged: list[tuple[Path, Path]] = []
+        try:
+            for change in files.values():
+                if change.before is None:
+                    continue
+
+                path = Path(change.path)
+                staged.append((_stage(path, self.load(change.before)), path))
+        except BaseException:
+            for temp, _ in staged:
+                temp.unlink(missing_ok=True)
+            raise
+
+        for temp, path in staged:
+            os.replace(temp, path)
+
+        self._write_entries(entries[:-steps])
+        print(f"reverted to before {entries[-steps].theme_name}")
+
+        if not reload:
+            return dict()
+
+        return reload_apps(
+            {
+                app_name: Path(change.path)
+                for app_name, change in files.items()
+                if change.before is not None
+            }
+        )
+
+
+def reload_apps(config_files: dict[str, Path]) -> dict[str, Exception]:
+    """Reloads every app at once, returning any errors by app name"""
+    appliers = [
+        APPLIER_TYPES[app_name](config_file=config_file)
+        for app_name, config_file in config_files.items()
+    ]
+
+    errors: dict[str, Exception] = dict()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(appliers) or 1) as pool:
+        futures = {
+            applier.app_name: pool.submit(applier.reload_config) for applier in appliers
+        }
+        for app_name, future in futures.items():
+            error = future.exception()
+            if isinstance(error, Exception):
+                errors[app_name] = error
+
+    return errors
+
+
+def _stage(path: Path, data: bytes) -> Path:
+    """Writes `data` to a temporary file next to `path`, keeping its mode"""
+    fd, temp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+
+    if path.exists():
+        # e.g. bordersrc is run as a script to reload it
+        shutil.copymode(path, temp)
+
+    return Path(temp)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    os.replace(_stage(path, data), path)
+    return None
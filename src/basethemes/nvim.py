@@ -0,0 +1,200 @@
+"""Standalone Neovim colorschemes generated from a theme
+
+Each colorscheme is a self-contained lua file with every highlight group
+precomputed from the palette, so Neovim can apply it with `:colorscheme` and
+no plugin. Highlight groups follow the base16 styling guidelines.
+
+The first line of each file records a hash of everything the file was rendered
+from, so regenerating a catalog only rewrites files whose palette changed, and
+themes sharing a palette only render it once.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+from basethemes import trace
+from basethemes.base import BaseTheme, BaseThemes
+
+# bump when the rendered output changes, to invalidate existing files
+FORMAT_VERSION = 2
+
+HASH_PREFIX = "-- basethemes palette "
+
+# group: (foreground base, background base, attributes)
+HIGHLIGHTS: dict[str, tuple[str | None, str | None, tuple[str, ...]]] = {
+    # editor
+    "Normal": ("05", "00", ()),
+    "NormalFloat": ("05", "01", ()),
+    "Cursor": ("00", "05", ()),
+    "CursorLine": (None, "01", ()),
+    "CursorLineNr": ("04", "01", ()),
+    "LineNr": ("03", "00", ()),
+    "SignColumn": ("03", "00", ()),
+    "ColorColumn": (None, "01", ()),
+    "Visual": (None, "02", ()),
+    "Search": ("01", "0A", ()),
+    "IncSearch": ("01", "09", ()),
+    "MatchParen": (None, "03", ()),
+    "StatusLine": ("04", "02", ()),
+    "StatusLineNC": ("03", "01", ()),
+    "WinSeparator": ("02", "00", ()),
+    "Pmenu": ("05", "01", ()),
+    "PmenuSel": ("01", "05", ()),
+    "Folded": ("03", "01", ()),
+    "NonText": ("03", None, ()),
+    "Title": ("0D", None, ()),
+    "Directory": ("0D", None, ()),
+    "ErrorMsg": ("08", "00", ()),
+    "WarningMsg": ("08", None, ()),
+    "Error": ("00", "08", ()),
+    "Todo": ("0A", "01", ()),
+    # syntax
+    "Comment": ("03", None, ("italic",)),
+    "Constant": ("09", None, ()),
+    "String": ("0B", None, ()),
+    "Character": ("08", None, ()),
+    "Number": ("09", None, ()),
+    "Boolean": ("09", None, ()),
+    "Float": ("09", None, ()),
+    "Identifier": ("08", None, ()),
+    "Function": ("0D", None, ()),
+    "Statement": ("08", None, ()),
+    "Conditional": ("0E", None, ()),
+    "Repeat": ("0A", None, ()),
+    "Label": ("0A", None, ()),
+    "Operator": ("05", None, ()),
+    "Keyword": ("0E", None, ()),
+    "Exception": ("08", None, ()),
+    "PreProc": ("0A", None, ()),
+    "Include": ("0D", None, ()),
+    "Define": ("0E", None, ()),
+    "Macro": ("08", None, ()),
+    "Type": ("0A", None, ()),
+    "StorageClass": ("0A", None, ()),
+    "Structure": ("0E", None, ()),
+    "Typedef": ("0A", None, ()),
+    "Special": ("0C", None, ()),
+    "Delimiter": ("0F", None, ()),
+    "Underlined": ("08", None, ("underline",)),
+    # diffs
+    "DiffAdd": ("0B", "01", ()),
+    "DiffChange": ("03", "01", ()),
+    "DiffDelete": ("08", "01", ()),
+    "DiffText": ("0D", "01", ()),
+    # diagnostics
+    "DiagnosticError": ("08", None, ()),
+    "DiagnosticWarn": ("0E", None, ()),
+    "DiagnosticInfo": ("0D", None, ()),
+    "DiagnosticHint": ("0C", None, ()),
+}
+
+
+def palette_hash(theme: BaseTheme) -> str:
+    """Hash of everything a colorscheme body is rendered from"""
+    colors = "".join(color.hex for color in theme.palette.bases.values())
+    key = f"{FORMAT_VERSION}:{theme.variant}:{colors}"
+
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def render_body(theme: BaseTheme) -> str:
+    """The highlight groups, which only depend on the palette and variant"""
+    palette = theme.palette
+    background = "light" if theme.variant == "light" else "dark"
+
+    lines = [
+        "vim.o.termguicolors = true",
+        f'vim.o.background = "{background}"',
+        "",
+        "local hl = vim.api.nvim_set_hl",
+    ]
+
+    for group, (fg, bg, attributes) in HIGHLIGHTS.items():
+        spec = []
+        if fg is not None:
+            spec.append(f'fg = "{str(palette[fg]).lower()}"')
+        if bg is not None:
+            spec.append(f'bg = "{str(palette[bg]).lower()}"')
+        spec += [f"{attribute} = true" for attribute in attributes]
+
+        lines.append(f'hl(0, "{group}", {{ {", ".join(spec)} }})')
+
+    lines.append("")
+    terminal_colors = theme.to_terminal_colors()
+    for n in range(16):
+        lines.append(f'vim.g.terminal_color_{n} = "{str(terminal_colors[n]).lower()}"')
+
+    return "\n".join(lines) + "\n"
+
+
+def render_colorscheme(theme: BaseTheme, body: str | None = None) -> str:
+    if body is None:
+        body = render_body(theme)
+
+    header = [
+        f"{HASH_PREFIX}{palette_hash(theme)}",
+        f"-- {theme.name} by {theme.author}, generated by basethemes".replace(
+            "\n", " "
+        ),
+        # before naming the colorscheme, as clearing highlights unsets the name
+        'vim.cmd("highlight clear")',
+        'if vim.fn.exists("syntax_on") == 1 then vim.cmd("syntax reset") end',
+        f'vim.g.colors_name = "{theme.lower_name}"',
+    ]
+
+    return "\n".join(header) + "\n" + body
+
+
+def colorscheme_file(theme: BaseTheme, colors_dir: Path) -> Path:
+    return colors_dir / f"{theme.lower_name}.lua"
+
+
+def is_current(theme: BaseTheme, colors_dir: Path) -> bool:
+    """Whether the colorscheme file was already generated from this palette"""
+    try:
+        with open(colorscheme_file(theme, colors_dir), "r") as f:
+            first_line = f.readline()
+    except FileNotFoundError:
+        return False
+
+    return first_line.rstrip("\n") == f"{HASH_PREFIX}{palette_hash(theme)}"
+
+
+def write_colorscheme(theme: BaseTheme, colors_dir: Path) -> bool:
+    """Writes `colors_dir/<lower-name>.lua`, returning False if it was current"""
+    if is_current(theme, colors_dir):
+        return False
+
+    _write_colorscheme(theme, colors_dir, render_body(theme))
+    return True
+
+
+@trace.traced
+def write_colorschemes(base_themes: BaseThemes, colors_dir: Path) -> int:
+    """Writes a colorscheme for every theme, returning how many were rewritten"""
+    bodies: dict[str, str] = dict()
+    written = 0
+
+    for theme in base_themes.themes.values():
+        if is_current(theme, colors_dir):
+            continue
+
+        key = palette_hash(theme)
+        if key not in bodies:
+            bodies[key] = render_body(theme)
+
+        _write_colorscheme(theme, colors_dir, bodies[key])
+        written += 1
+
+    return written
+
+
+def _write_colorscheme(theme: BaseTheme, colors_dir: Path, body: str) -> None:
+    colors_dir.mkdir(parents=True, exist_ok=True)
+
+    with open(colorscheme_file(theme, colors_dir), "w") as f:
+        f.write(render_colorscheme(theme, body=body))
+
+    return None
@@ -0,0 +1,246 @@
+"""Previewing themes live in the current terminal, without applying them
+
+Terminals can be recolored with OSC escape sequences: OSC 4 sets colors 0-15,
+and OSC 10, 11 and 12 set the foreground, background and cursor colors (taken
+from the kitty mapping, as when applying). Nothing is written to disk, and the
+terminal's own colors are restored on exit with the matching reset sequences,
+OSC 104 and 110-112.
+
+Each theme's sequence is a single precomputed write. For a whole collection
+they are built from the flat terminal color block (see basethemes.xterm), so
+cycling through hundreds of themes only writes bytes that already exist.
+Inside tmux, sequences are wrapped to be passed through to the terminal.
+"""
+
+from __future__ import annotations
+
+import os
+import select
+import signal
+import threading
+import termios
+import tty
+from contextlib import contextmanager
+from typing import BinaryIO, Iterable, Iterator, Sequence
+
+from basethemes.applier import KittyColorMapping, basic_kitty_mapping
+from basethemes.base import BaseTheme, BaseThemes
+from basethemes.terminal_colors import TerminalColor
+from basethemes.xterm import palette_color_block, terminal_color_block
+
+BEL = "\x07"
+
+RESET_SEQUENCE = f"\x1b]104{BEL}\x1b]110{BEL}\x1b]111{BEL}\x1b]112{BEL}".encode()
+
+NEXT_KEYS = {"j", "n", "l", " ", "\x1b[B", "\x1b[C"}
+PREVIOUS_KEYS = {"k", "p", "h", "\x1b[A", "\x1b[D"}
+SELECT_KEYS = {"\r", "\n"}
+QUIT_KEYS = {"q", "\x1b", "\x03", "\x04"}
+
+
+def _index(terminal_color: TerminalColor) -> int:
+    return int(terminal_color.value.removeprefix("color"))
+
+
+def color_sequence(
+    colors: Sequence[int], mapping: KittyColorMapping = basic_kitty_mapping
+) -> bytes:
+    """OSC sequences for 16 packed 0xRRGGBB terminal colors"""
+    palette = ";".join(f"{n};#{value:06x}" for n, value in enumerate(colors))
+    foreground = colors[_index(mapping.foreground)]
+    background = colors[_index(mapping.background)]
+    cursor = colors[_index(mapping.cursor)]
+
+    return (
+        f"\x1b]4;{palette}{BEL}"
+        f"\x1b]10;#{foreground:06x}{BEL}"
+        f"\x1b]11;#{background:06x}{BEL}"
+        f"\x1b]12;#{cursor:06x}{BEL}"
+    ).encode()
+
+
+def preview_sequence(
+    theme: BaseTheme, mapping: KittyColorMapping = basic_kitty_mapping
+) -> bytes:
+    colors = [int(color) for color in theme.to_terminal_colors().to_dict().values()]
+    return color_sequence(colors, mapping)
+
+
+def preview_sequences(
+    base_themes: BaseThemes, mapping: KittyColorMapping = basic_kitty_mapping
+) -> dict[str, bytes]:
+    """The preview sequence of every theme, computed in a single batch"""
+    terminal_colors = terminal_color_block(
+        palette_color_block(base_themes), base_themes.palette_type
+    )
+
+    return {
+        name: color_sequence(terminal_colors[16 * n : 16 * (n + 1)], mapping)
+        for n, name in enumerate(base_themes.themes)
+    }
+
+
+def wrap_for_tmux(sequence: bytes) -> bytes:
+    """Passes the sequence through tmux to the terminal it is running in"""
+    return b"\x1bPtmux;" + sequence.replace(b"\x1b", b"\x1b\x1b") + b"\x1b\\"
+
+
+class Preview:
+    """Recolors a terminal, restoring its colors when closed"""
+
+    out: BinaryIO
+    tmux: bool
+
+    def __init__(self, out: BinaryIO, tmux: bool | None = None) -> None:
+        if tmux is None:
+            tmux = "TMUX" in os.environ
+
+        self.out = out
+        self.tmux = tmux
+
+        return None
+
+    def write(self, sequence: bytes) -> None:
+        if self.tmux:
+            sequence = wrap_for_tmux(sequence)
+
+        self.out.write(sequence)
+        self.out.flush()
+
+        return None
+
+    def restore(self) -> None:
+        self.write(RESET_SEQUENCE)
+        return None
+
+    def __enter__(self) -> Preview:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.restore()
+        return None
+
+
+def browse(
+    sequences: dict[str, bytes],
+    keys: Iterable[str],
+    preview: Preview,
+    start: int = 0,
+) -> str | None:
+    """Cycles through the previews on each key, returning the selected theme"""
+    names = list(sequences)
+    if not names:
+        return None
+
+    n = start % len(names)
+    _show(preview, sequences, names, n)
+
+    for key in keys:
+        if key in NEXT_KEYS:
+            n = (n + 1) % len(names)
+        elif key in PREVIOUS_KEYS:
+            n = (n - 1) % len(names)
+        elif key in SELECT_KEYS:
+            _status(preview, "")
+            return names[n]
+        elif key in QUIT_KEYS:
+            break
+        else:
+            continue
+
+        _show(preview, sequences, names, n)
+
+    _status(preview, "")
+    return None
+
+
+def _show(
+    preview: Preview, sequences: dict[str, bytes], names: list[str], n: int
+) -> None:
+    preview.write(sequences[names[n]])
+    _status(preview, f"{n + 1}/{len(names)}  {names[n]}")
+
+    return None
+
+
+def _status(preview: Preview, text: str) -> None:
+    """Rewrites the current line, which isn't an escape sequence for tmux"""
+    preview.out.write(f"\r\x1b[K{text}".encode())
+    preview.out.flush()
+
+    return None
+
+
+@contextmanager
+def raw_terminal(fd: int) -> Iterator[None]:
+    """Reads keys as they are pressed, without echoing them"""
+    attributes = termios.tcgetattr(fd)
+    try:
+        tty.setcbreak(fd)
+        yield
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, attributes)
+
+
+@contextmanager
+def interrupt_on_terminate() -> Iterator[None]:
+    """Raises KeyboardInterrupt on SIGTERM, so the colors are still restored"""
+
+    def interrupt(signum, frame) -> None:
+        raise KeyboardInterrupt
+
+    if threading.current_thread() is not threading.main_thread():
+        # handlers can only be set from the main thread
+        yield
+        return
+
+    previous = signal.signal(signal.SIGTERM, interrupt)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+
+
+def read_keys(fd: int) -> Iterator[str]:
+    """Keys pressed on the terminal, with arrow keys as their escape sequence"""
+    while True:
+        char = os.read(fd, 1)
+        if not char:
+            return
+
+        if char == b"\x1b":
+            # the rest of an arrow key arrives immediately, unlike a second key
+            ready, _, _ = select.select([fd], [], [], 0.02)
+            if ready:
+                char += os.read(fd, 2)
+
+        yield char.decode(errors="replace")
+
+
+def browse_terminal(
+    sequences: dict[str, bytes], start: int = 0, tty_path: str = "/dev/tty"
+) -> str | None:
+    """Browses the previews interactively on the controlling terminal"""
+    with open(tty_path, "rb+", buffering=0) as terminal:
+        fd = terminal.fileno()
+        with interrupt_on_terminate(), raw_terminal(fd), Preview(terminal) as preview:
+            try:
+                return browse(sequences, read_keys(fd), preview, start=start)
+            except KeyboardInterrupt:
+                return None
+
+
+def preview_theme(theme: BaseTheme, tty_path: str = "/dev/tty") -> None:
+    """Shows a single theme until enter is pressed"""
+    with open(tty_path, "rb+", buffering=0) as terminal:
+        with interrupt_on_terminate(), Preview(terminal) as preview:
+            preview.write(preview_sequence(theme))
+            _status(preview, f"previewing {theme.name}, press enter to restore ")
+            try:
+                terminal.readline()
+            except KeyboardInterrupt:
+                pass
+
+            _status(preview, "")
+
+    return None
@@ -0,0 +1,188 @@
+"""Sparse, shallow syncing of the scheme repo
+
+Each sync clones only the latest commit, and only checks out the scheme
+directories that are actually loaded. Checkouts live side by side in a hidden
+`.<name>.trees` directory next to the repo dir, which is itself a symlink to the
+current checkout:
+
+    repos/tinted-theming -> .tinted-theming.trees/<commit sha>
+
+A finished checkout is published by atomically replacing that symlink, so
+readers only ever see a complete tree, and a sync running in the background
+never blocks applying a theme from the current tree. A plain clone already at
+the repo dir is moved into the trees directory on the first sync.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from basethemes import trace
+
+SPARSE_PATHS = ["base16", "base24"]
+
+# number of published trees to keep, so that a process still reading the
+# previous tree isn't broken by a sync swapping in a new one
+KEEP_TREES = 2
+
+
+def trees_dir_for(repo_dir: Path) -> Path:
+    return repo_dir.with_name(f".{repo_dir.name}.trees")
+
+
+def current_commit(repo_dir: Path) -> str | None:
+    """The commit of the published tree, or None if nothing has been synced"""
+    if not repo_dir.is_symlink():
+        return None
+
+    return Path(os.readlink(repo_dir)).name
+
+
+def remote_commit(repo_url: str) -> str:
+    from git import Git
+
+    head, _, _ = Git().ls_remote(repo_url, "HEAD").partition("\t")
+    if not head:
+        raise ValueError(f"Could not determine HEAD of {repo_url}")
+
+    return head
+
+
+@trace.traced
+def clone_sparse(repo_url: str, to_path: Path, paths: list[str]) -> str:
+    """Shallow clone that only checks out `paths`, returning the cloned commit"""
+    from git import Repo
+
+    repo = Repo.clone_from(
+        repo_url, to_path=to_path, depth=1, sparse=True, filter="blob:none"
+    )
+    repo.git.sparse_checkout("set", *paths)
+
+    return repo.head.commit.hexsha
+
+
+def publish_tree(repo_dir: Path, tree: Path) -> None:
+    """Atomically points `repo_dir` at `tree`"""
+    if repo_dir.exists() and not repo_dir.is_symlink():
+        raise FileExistsError(
+            f"{repo_dir} is not managed by sync, move it aside to sync into it"
+        )
+
+    tmp_link = repo_dir.with_name(f".{repo_dir.name}.{os.getpid()}.link")
+    tmp_link.unlink(missing_ok=True)
+    tmp_link.symlink_to(tree.relative_to(repo_dir.parent))
+    os.replace(tmp_link, repo_dir)
+
+    return None
+
+
+def adopt_clone(repo_dir: Path) -> None:
+    """Moves a plain clone at `repo_dir` into the trees dir, and publishes it
+
+    e.g. a full clone from before syncing was sparse. Anything other than a git
+    repo is left alone, rather than risk moving aside a directory of local files.
+    """
+    from git import InvalidGitRepositoryError, Repo
+
+    try:
+        commit = Repo(repo_dir).head.commit.hexsha
+    except (InvalidGitRepositoryError, ValueError):
+        raise FileExistsError(
+            f"{repo_dir} is not a git repo managed by sync, move it aside to sync into it"
+        )
+
+    tree = trees_dir_for(repo_dir) / commit
+    repo_dir.rename(tree)
+    publish_tree(repo_dir, tree)
+
+    return None
+
+
+def prune_trees(repo_dir: Path, keep: int = KEEP_TREES) -> None:
+    trees_dir = trees_dir_for(repo_dir)
+    current = current_commit(repo_dir)
+
+    trees = sorted(
+        (tree for tree in trees_dir.iterdir() if tree.is_dir()),
+        key=lambda tree: tree.stat().st_mtime,
+        reverse=True,
+    )
+    stale = [
+        tree
+        for tree in trees
+        if not tree.name.startswith("tmp-") and tree.name != current
+    ][keep - 1 :]
+
+    for tree in stale:
+        shutil.rmtree(tree, ignore_errors=True)
+
+    return None
+
+
+@trace.traced
+def sync_repo(
+    repo_url: str,
+    repo_dir: Path,
+    paths: list[str] = SPARSE_PATHS,
+    block: bool = False,
+) -> bool:
+    """Brings `repo_dir` up to date with the remote, returning whether it changed
+
+    If another sync is already running, returns False without doing anything,
+    or with `block` waits for it to finish first.
+    """
+    trees_dir = trees_dir_for(repo_dir)
+    trees_dir.mkdir(parents=True, exist_ok=True)
+
+    with open(trees_dir / ".lock", "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX if block else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+
+        if repo_dir.exists() and not repo_dir.is_symlink():
+            adopt_clone(repo_dir)
+
+        if current_commit(repo_dir) == remote_commit(repo_url):
+            return False
+
+        tmp_tree = Path(tempfile.mkdtemp(prefix="tmp-", dir=trees_dir))
+        try:
+            commit = clone_sparse(repo_url, to_path=tmp_tree, paths=paths)
+            tree = trees_dir / commit
+
+            if tree.exists():
+                shutil.rmtree(tmp_tree)
+            else:
+                tmp_tree.rename(tree)
+        except BaseException:
+            shutil.rmtree(tmp_tree, ignore_errors=True)
+            raise
+
+        publish_tree(repo_dir, tree)
+        os.utime(tree)
+        prune_trees(repo_dir)
+
+    return True
+
+
+def sync_in_background(repo_url: str, repo_dir: Path) -> subprocess.Popen:
+    """Starts a detached sync, which carries on after the calling process exits"""
+    return subprocess.Popen(
+        [sys.executable, "-m", "basethemes.sync", repo_url, str(repo_dir)],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+if __name__ == "__main__":
+    repo_url, repo_dir = sys.argv[1:]
+    sync_repo(repo_url, Path(repo_dir))
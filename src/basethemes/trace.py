@@ -0,0 +1,174 @@
+"""Opt-in timing of the load and apply pipelines
+
+Tracing is disabled by default. While disabled, `traced` functions cost a
+single flag check, and so do the hot paths that check `tracer.enabled` before
+building a span - other `span` calls still build their name and arguments, and
+enter a no-op context manager.
+
+Enable it with `enable()`, or by setting `$BASETHEMES_TRACE` to a file that the
+collected spans are written to when the process exits:
+
+    BASETHEMES_TRACE=apply.trace.json python -m basethemes.foo
+
+Spans can be exported as plain json, or in the Chrome trace event format for
+viewing in chrome://tracing or https://ui.perfetto.dev
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Iterator, Literal, ParamSpec, TypeVar
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+ExportFormat = Literal["json", "chrome"]
+
+
+@dataclass
+class Span:
+    name: str
+    start: float  # seconds since the tracer was enabled
+    duration: float  # seconds
+    # net change in allocated memory blocks, which only approximates the number
+    # of objects created: freed blocks offset new ones, and a block isn't an object
+    allocated_blocks: int
+    thread_id: int
+    args: dict[str, Any] = field(default_factory=dict)
+
+
+class Tracer:
+    enabled: bool
+    spans: list[Span]
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.spans = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+        return None
+
+    def enable(self) -> None:
+        if not self.enabled:
+            self._origin = time.perf_counter()
+        self.enabled = True
+
+        return None
+
+    def disable(self) -> None:
+        self.enabled = False
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans = []
+
+        return None
+
+    @contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            span = Span(
+                name=name,
+                start=start - self._origin,
+                duration=duration,
+                allocated_blocks=sys.getallocatedblocks() - blocks,
+                thread_id=threading.get_ident(),
+                args=args,
+            )
+            with self._lock:
+                self.spans.append(span)
+
+    def to_json(self) -> list[dict[str, Any]]:
+        return [asdict(span) for span in self.spans]
+
+    def to_chrome_trace(self) -> dict[str, Any]:
+        """Formats spans as complete ("X") events, with timestamps in microseconds"""
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "ph": "X",
+                "ts": span.start * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": span.args | {"allocated_blocks": span.allocated_blocks},
+            }
+            for span in self.spans
+        ]
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path: Path | str, format: ExportFormat = "chrome") -> None:
+        if format == "json":
+            output: Any = self.to_json()
+        elif format == "chrome":
+            output = self.to_chrome_trace()
+        else:
+            raise ValueError(f"Unknown export format: {format}")
+
+        with open(path, "w") as f:
+            json.dump(output, f, indent=2, default=str)
+
+        return None
+
+
+tracer = Tracer()
+
+enable = tracer.enable
+disable = tracer.disable
+span = tracer.span
+export = tracer.export
+
+
+def traced(func: Callable[P, R]) -> Callable[P, R]:
+    """Records a span named after the qualified name of the decorated function"""
+    name = func.__qualname__
+
+    @wraps(func)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        if not tracer.enabled:
+            return func(*args, **kwargs)
+
+        with tracer.span(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def _init_from_env() -> None:
+    trace_file = os.getenv("BASETHEMES_TRACE")
+    if not trace_file:
+        return None
+
+    format = os.getenv("BASETHEMES_TRACE_FORMAT", "chrome")
+    if format not in ("json", "chrome"):
+        raise EnvironmentError(f"$BASETHEMES_TRACE_FORMAT was not valid: {format}")
+
+    tracer.enable()
+    atexit.register(tracer.export, trace_file, format)
+
+    return None
+
+
+_init_from_env()
@@ -0,0 +1,362 @@
+"""Matching themes to an image, e.g. the current wallpaper
+
+The image is sampled down to at most `MAX_SAMPLES` pixels while decoding, and
+reduced to a few dominant colors with median cut. Themes are then ranked by
+the distance between those colors and each theme's terminal colors in CIELAB,
+computed over the flat color block of the whole collection at once.
+
+PPM (P6) and PNG images are decoded with the standard library. PNG decoding
+uses Pillow instead when it is installed, which is much faster for large
+images and also supports interlacing and other formats.
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+import zlib
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Sequence
+
+from basethemes.base import BaseTheme, BaseThemes
+from basethemes.color import Color
+from basethemes.xterm import palette_color_block, terminal_color_block
+
+MAX_SAMPLES = 16384
+NUM_COLORS = 8
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# channels per pixel for each png color type
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+@dataclass(frozen=True)
+class DominantColor:
+    color: Color
+    weight: float  # fraction of sampled pixels
+
+
+def sample_step(width: int, height: int, max_samples: int) -> int:
+    """Distance between sampled pixels, in both directions"""
+    return max(1, math.ceil(math.sqrt(width * height / max_samples)))
+
+
+def read_image(
+    path: Path | str, max_samples: int = MAX_SAMPLES, use_pillow: bool = True
+) -> array:
+    """Samples an image as a flat array of packed 0xRRGGBB pixels
+
+    Without Pillow, PNGs are decompressed and unfiltered in pure python, which
+    takes seconds for a large image, e.g. around 2s for a 12 megapixel photo.
+    """
+    path = Path(path)
+
+    with open(path, "rb") as f:
+        magic = f.read(8)
+        f.seek(0)
+
+        if magic.startswith(b"P6"):
+            return read_ppm(f, max_samples)
+
+        if magic == PNG_SIGNATURE:
+            if use_pillow:
+                try:
+                    return read_pillow(path, max_samples)
+                except ImportError:
+                    pass
+
+            return read_png(f, max_samples)
+
+    if use_pillow:
+        return read_pillow(path, max_samples)
+
+    raise ValueError(f"Unsupported image format: {path}")
+
+
+def pack_rgb(rgb: bytes | bytearray, step: int = 1) -> array:
+    """Packs every `step`th pixel of interleaved 8-bit rgb data"""
+    red, green, blue = rgb[0 :: 3 * step], rgb[1 :: 3 * step], rgb[2 :: 3 * step]
+    return array("I", [(r << 16) | (g << 8) | b for r, g, b in zip(red, green, blue)])
+
+
+def _read_ppm_token(f: BinaryIO) -> bytes:
+    token = b""
+    while True:
+        char = f.read(1)
+        if char == b"#":
+            f.readline()
+        elif not char or char.isspace():
+            if token:
+                return token
+            if not char:
+                raise ValueError("Unexpected end of ppm header")
+        else:
+            token += char
+
+
+def read_ppm(f: BinaryIO, max_samples: int = MAX_SAMPLES) -> array:
+    if _read_ppm_token(f) != b"P6":
+        raise ValueError("Only binary (P6) ppm images are supported")
+
+    width, height, maxval = (int(_read_ppm_token(f)) for _ in range(3))
+    if maxval > 255:
+        raise ValueError(f"Only 8-bit ppm images are supported, got {maxval=}")
+
+    step = sample_step(width, height, max_samples)
+    row_size = width * 3
+
+    pixels = array("I")
+    for y in range(0, height, step):
+        row = f.read(row_size)
+        pixels.extend(pack_rgb(row, step))
+
+        # skip the rows in between samples
+        f.seek(row_size * (step - 1), 1)
+
+    if maxval != 255:
+        scale = 255 / maxval
+        pixels = array(
+            "I",
+            [
+                (round((p >> 16) * scale) << 16)
+                | (round(((p >> 8) & 0xFF) * scale) << 8)
+                | round((p & 0xFF) * scale)
+                for p in pixels
+            ],
+        )
+
+    return pixels
+
+
+def read_pillow(path: Path, max_samples: int = MAX_SAMPLES) -> array:
+    from PIL import Image
+
+    with Image.open(path) as image:
+        step = sample_step(image.width, image.height, max_samples)
+        image.draft("RGB", (image.width // step, image.height // step))
+        sampled = image.convert("RGB").reduce(step)
+
+        return pack_rgb(sampled.tobytes())
+
+
+def read_png(f: BinaryIO, max_samples: int = MAX_SAMPLES) -> array:
+    """Decodes non-interlaced 8-bit png images"""
+    if f.read(8) != PNG_SIGNATURE:
+        raise ValueError("Not a png image")
+
+    header: tuple[int, ...] = ()
+    palette = b""
+    data = zlib.decompressobj()
+    raw = bytearray()
+
+    while True:
+        length, kind = struct.unpack(">I4s", f.read(8))
+        chunk = f.read(length)
+        f.read(4)  # crc
+
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", chunk)
+        elif kind == b"PLTE":
+            palette = chunk
+        elif kind == b"IDAT":
+            raw += data.decompress(chunk)
+        elif kind == b"IEND":
+            break
+
+    raw += data.flush()
+
+    width, height, bit_depth, color_type, _, _, interlace = header
+    if bit_depth != 8 or interlace:
+        raise ValueError("Only non-interlaced 8-bit png images are supported")
+
+    channels = PNG_CHANNELS[color_type]
+    row_size = width * channels
+    step = sample_step(width, height, max_samples)
+
+    pixels = array("I")
+    previous = bytearray(row_size)
+    for y in range(height):
+        start = y * (row_size + 1)
+        row = _unfilter(
+            raw[start], raw[start + 1 : start + 1 + row_size], previous, channels
+        )
+        previous = row
+
+        if y % step:
+            continue
+
+        if color_type == 2:
+            rgb = row
+        elif color_type == 6:
+            rgb = bytearray(width * 3)
+            for channel in range(3):
+                rgb[channel::3] = row[channel::4]
+        elif color_type == 3:
+            rgb = b"".join(palette[3 * n : 3 * n + 3] for n in row)
+        else:
+            gray = row[::channels]
+            rgb = bytearray(width * 3)
+            for channel in range(3):
+                rgb[channel::3] = gray
+
+        pixels.extend(pack_rgb(rgb, step))
+
+    return pixels
+
+
+def _unfilter(
+    filter_type: int, row: bytearray, previous: bytearray, bpp: int
+) -> bytearray:
+    if filter_type == 0:
+        return row
+
+    if filter_type == 2:
+        return bytearray((a + b) & 0xFF for a, b in zip(row, previous))
+
+    for i in range(len(row)):
+        left = row[i - bpp] if i >= bpp else 0
+        up = previous[i]
+
+        if filter_type == 1:
+            row[i] = (row[i] + left) & 0xFF
+        elif filter_type == 3:
+            row[i] = (row[i] + (left + up) // 2) & 0xFF
+        elif filter_type == 4:
+            up_left = previous[i - bpp] if i >= bpp else 0
+            estimate = left + up - up_left
+            distances = (
+                abs(estimate - left),
+                abs(estimate - up),
+                abs(estimate - up_left),
+            )
+            if distances[0] <= distances[1] and distances[0] <= distances[2]:
+                predictor = left
+            elif distances[1] <= distances[2]:
+                predictor = up
+            else:
+                predictor = up_left
+            row[i] = (row[i] + predictor) & 0xFF
+        else:
+            raise ValueError(f"Invalid png filter type: {filter_type}")
+
+    return row
+
+
+def dominant_colors(
+    pixels: Sequence[int], num_colors: int = NUM_COLORS
+) -> list[DominantColor]:
+    """Median cut, repeatedly splitting the box with the widest channel range"""
+    if not pixels:
+        raise ValueError("Can't find dominant colors without any pixels")
+
+    boxes: list[list[int]] = [list(pixels)]
+    while len(boxes) < num_colors:
+        widest, shift, spread = None, 0, 0
+        for box in boxes:
+            for channel_shift in (16, 8, 0):
+                channel = [(p >> channel_shift) & 0xFF for p in box]
+                if max(channel) - min(channel) > spread:
+                    widest, shift = box, channel_shift
+                    spread = max(channel) - min(channel)
+
+        if widest is None:
+            break  # every box is a single color
+
+        widest.sort(key=lambda p: (p >> shift) & 0xFF)
+        boxes.remove(widest)
+        middle = len(widest) // 2
+        boxes += [widest[:middle], widest[middle:]]
+
+    total = len(pixels)
+    result = [
+        DominantColor(color=Color.from_int(_mean_color(box)), weight=len(box) / total)
+        for box in boxes
+    ]
+
+    return sorted(result, key=lambda dominant: dominant.weight, reverse=True)
+
+
+def _mean_color(box: list[int]) -> int:
+    n = len(box)
+    red = round(sum(p >> 16 for p in box) / n)
+    green = round(sum((p >> 8) & 0xFF for p in box) / n)
+    blue = round(sum(p & 0xFF for p in box) / n)
+
+    return (red << 16) | (green << 8) | blue
+
+
+# srgb channel value to linear light
+_LINEAR = [
+    v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+    for v in (n / 255 for n in range(256))
+]
+
+
+def _lab_f(t: float) -> float:
+    return t ** (1 / 3) if t > 0.008856 else 7.787 * t + 16 / 116
+
+
+def to_lab(value: int) -> tuple[float, float, float]:
+    """CIELAB of a packed srgb color, with a D65 white point"""
+    r, g, b = _LINEAR[value >> 16], _LINEAR[(value >> 8) & 0xFF], _LINEAR[value & 0xFF]
+
+    x = _lab_f((0.4124 * r + 0.3576 * g + 0.1805 * b) / 0.95047)
+    y = _lab_f(0.2126 * r + 0.7152 * g + 0.0722 * b)
+    z = _lab_f((0.0193 * r + 0.1192 * g + 0.9505 * b) / 1.08883)
+
+    return (116 * y - 16, 500 * (x - y), 200 * (y - z))
+
+
+def palette_distance(distances: list[list[float]], weights: list[float]) -> float:
+    """Symmetric mean distance between the nearest colors of two palettes
+
+    `distances` holds a row for each theme color, of its distance to each of the
+    image colors. Image colors are weighted by how much of the image they cover.
+    """
+    image_to_theme = sum(
+        weight * min(column) for weight, column in zip(weights, zip(*distances))
+    )
+    theme_to_image = sum(min(row) for row in distances) / len(distances)
+
+    return (image_to_theme + theme_to_image) / 2
+
+
+def match_themes(
+    pixels: Sequence[int],
+    base_themes: BaseThemes,
+    top: int = 5,
+    num_colors: int = NUM_COLORS,
+) -> list[tuple[BaseTheme, float]]:
+    """The closest themes to the sampled image pixels, with their distances"""
+    dominant = dominant_colors(pixels, num_colors)
+    image_labs = [to_lab(int(color.color)) for color in dominant]
+    weights = [color.weight for color in dominant]
+
+    terminal_colors = terminal_color_block(
+        palette_color_block(base_themes), base_themes.palette_type
+    )
+
+    # many colors are shared across themes, so only compare each one once
+    unique = set(terminal_colors)
+    distances_to_image = {
+        value: [math.dist(theme_lab, lab) for lab in image_labs]
+        for value, theme_lab in zip(unique, map(to_lab, unique))
+    }
+
+    names = list(base_themes.themes)
+    distances = [
+        palette_distance(
+            [
+                distances_to_image[value]
+                for value in terminal_colors[16 * n : 16 * (n + 1)]
+            ],
+            weights,
+        )
+        for n in range(len(names))
+    ]
+
+    ranked = sorted(range(len(names)), key=distances.__getitem__)[:top]
+    return [(base_themes[names[n]], distances[n]) for n in ranked]
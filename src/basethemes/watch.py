@@ -0,0 +1,272 @@
+"""Re-asserting the applied theme when app configs are overwritten
+
+Other tools and dotfile syncs can rewrite app configs, dropping the theme. The
+watcher blocks on inotify events for the directory of each config file, so it
+uses no cpu while idle. Bursts of events are debounced, and only the apps whose
+themed settings no longer match the theme's render are rewritten and reloaded.
+
+Directories are watched rather than the files themselves, so configs that are
+replaced by renaming a new file over them are still followed. Symlinked configs
+are watched at their target. inotify is Linux only.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import os
+import select
+import struct
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+from basethemes import trace
+from basethemes.applier import ThemeApplier
+from basethemes.base import BaseTheme
+from basethemes.foo import APPLIER_CONFIGS, DOT_CONFIG
+
+# seconds without events before checking the changed configs
+DEBOUNCE = 0.25
+
+# from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class Inotify:
+    """Minimal inotify binding, reading (watch descriptor, mask, name) events"""
+
+    fd: int
+
+    def __init__(self) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError(f"inotify is not available on {sys.platform}")
+
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self._check(self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC))
+
+        return None
+
+    def _check(self, result: int) -> int:
+        if result < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        return result
+
+    def add_watch(self, path: Path, mask: int = WATCH_MASK) -> int:
+        return self._check(
+            self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        )
+
+    def read_events(self) -> list[tuple[int, int, str]]:
+        """Every event that is ready, without blocking"""
+        events = []
+        while True:
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+                offset += EVENT_HEADER.size
+                name = buffer[offset : offset + length].rstrip(b"\0")
+                offset += length
+
+                events.append((wd, mask, os.fsdecode(name)))
+
+    def close(self) -> None:
+        os.close(self.fd)
+        return None
+
+
+@dataclass(frozen=True)
+class WatchedConfig:
+    applier_type: type[ThemeApplier]
+    config_file: Path  # as given to the applier
+    target: Path  # the file actually written, after resolving symlinks
+
+
+class ConfigWatcher:
+    """Watches app configs and rewrites any whose themed settings drift
+
+    The theme is rendered for each app once up front, and compared against the
+    config every time it changes. Apps without a config file are skipped.
+    """
+
+    theme: BaseTheme
+    reload: bool
+    debounce: float
+    configs: list[WatchedConfig]
+    rendered: dict[Path, dict[str, str]]
+
+    def __init__(
+        self,
+        theme: BaseTheme,
+        config_dir: Path = DOT_CONFIG,
+        reload: bool = True,
+        debounce: float = DEBOUNCE,
+        applier_configs: list[tuple[type[ThemeApplier], str]] = APPLIER_CONFIGS,
+    ) -> None:
+        self.theme = theme
+        self.reload = reload
+        self.debounce = debounce
+
+        self.configs = []
+        for applier_type, config_file in applier_configs:
+            if not (config_dir / config_file).is_file():
+                # e.g. sketchybar and borders, which only run on macOS
+                print(
+                    f"skipping {applier_type.app_name}, {config_dir / config_file} "
+                    "does not exist",
+                    file=sys.stderr,
+                )
+                continue
+
+            self.configs.append(
+                WatchedConfig(
+                    applier_type=applier_type,
+                    config_file=config_dir / config_file,
+                    target=(config_dir / config_file).resolve(),
+                )
+            )
+
+        if not self.configs:
+            raise FileNotFoundError(f"Could not find any app configs in {config_dir}")
+
+        self.rendered = {
+            config.config_file: config.applier_type.render(theme)
+            for config in self.configs
+        }
+
+        # woken by `stop`, so that `run` can block on inotify without a timeout
+        self._stop_read, self._stop_write = os.pipe()
+        self._stopped = False
+
+        return None
+
+    def check(self, configs: list[WatchedConfig] | None = None) -> list[str]:
+        """Re-applies the theme to drifted configs, returning their app names"""
+        if configs is None:
+            configs = self.configs
+
+        reapplied = []
+        for config in configs:
+            rendered = self.rendered[config.config_file]
+
+            try:
+                # a new applier each time, as kitty parses the config up front
+                applier = config.applier_type(config_file=config.config_file)
+                if applier.is_current(rendered):
+                    continue
+
+                with trace.span("watch.reapply", app=config.applier_type.app_name):
+                    applier.write_theme(self.theme, rendered=rendered)
+                    print(f"re-applied {self.theme.name} to {config.config_file}")
+                    if self.reload:
+                        applier.reload_config()
+
+            except Exception as e:
+                # e.g. the config is mid-way through being replaced
+                print(f"could not re-apply {config.config_file}: {e}", file=sys.stderr)
+                continue
+
+            reapplied.append(config.applier_type.app_name)
+
+        return reapplied
+
+    def run(self) -> None:
+        """Re-applies the theme on every change to the configs, until stopped"""
+        inotify = Inotify()
+
+        try:
+            by_wd: dict[int, list[WatchedConfig]] = dict()
+            for config in self.configs:
+                wd = inotify.add_watch(config.target.parent)
+                by_wd.setdefault(wd, []).append(config)
+
+            # configs may have drifted while nothing was watching
+            self.check()
+
+            while not self._stopped:
+                ready, _, _ = select.select([inotify.fd, self._stop_read], [], [])
+                if self._stop_read in ready:
+                    break
+
+                changed = self._debounced_changes(inotify, by_wd)
+                if changed:
+                    self.check(changed)
+
+        finally:
+            inotify.close()
+
+        return None
+
+    def _debounced_changes(
+        self, inotify: Inotify, by_wd: dict[int, list[WatchedConfig]]
+    ) -> list[WatchedConfig]:
+        """Gathers events until they've been quiet for `debounce` seconds"""
+        changed: set[WatchedConfig] = set()
+
+        while True:
+            for wd, mask, name in inotify.read_events():
+                if mask & IN_Q_OVERFLOW:
+                    changed.update(self.configs)
+                    continue
+
+                changed.update(
+                    config for config in by_wd.get(wd, []) if config.target.name == name
+                )
+
+            ready, _, _ = select.select(
+                [inotify.fd, self._stop_read], [], [], self.debounce
+            )
+            if not ready or self._stop_read in ready:
+                break
+
+        # in the order the apps are applied
+        return [config for config in self.configs if config in changed]
+
+    def stop(self) -> None:
+        """Stops `run`, which may be blocked in another thread"""
+        self._stopped = True
+        os.write(self._stop_write, b"\0")
+
+        return None
+
+    def close(self) -> None:
+        os.close(self._stop_read)
+        os.close(self._stop_write)
+
+        return None
+
+
+def watch_configs(
+    theme: BaseTheme,
+    config_dir: Path = DOT_CONFIG,
+    reload: bool = True,
+    debounce: float = DEBOUNCE,
+) -> None:
+    """Keeps the theme applied to every app until interrupted"""
+    watcher = ConfigWatcher(theme, config_dir, reload=reload, debounce=debounce)
+
+    print(f"watching configs in {config_dir} for {theme.name}")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+    return None
@@ -0,0 +1,147 @@
+"""Batched terminal and xterm 256-color palettes for whole catalogs
+
+Colors are handled as flat blocks of packed 0xRRGGBB integers, with one row of
+colors per theme (the same layout as `Catalog.colors`). Each step works on a
+whole column at a time - one color slot across every theme - so the work per
+catalog is a fixed number of column operations regardless of its size.
+
+The extended colors 16-255 follow the xterm layout, but rather than the fixed
+xterm values they are blended from the theme:
+
+- the 6x6x6 cube is interpolated between the 8 normal terminal colors, with
+  black, red, green and blue at the corners along each axis
+- the 24 step grayscale ramp runs from black (color0) to white (color7)
+"""
+
+from __future__ import annotations
+
+from array import array
+from itertools import product
+from typing import Sequence, Type
+
+from basethemes.base import BasePalette, BaseThemes
+from basethemes.catalog import Catalog
+from basethemes.color import Color
+
+CUBE_SIZE = 6
+GRAY_STEPS = 24
+
+Column = list[float]
+
+
+def gather(colors: Sequence[int], row_length: int, indices: Sequence[int]) -> array:
+    """Picks `indices` from every row of a flat color block"""
+    num_rows = len(colors) // row_length
+    result = array("I", bytes(4 * num_rows * len(indices)))
+
+    for slot, n in enumerate(indices):
+        result[slot :: len(indices)] = array("I", colors[n::row_length])
+
+    return result
+
+
+def terminal_color_block(
+    colors: Sequence[int], palette_type: Type[BasePalette]
+) -> array:
+    """color0-color15 of every palette in a flat block of base colors"""
+    return gather(colors, palette_type._palette_length, palette_type._terminal_bases)
+
+
+def palette_color_block(base_themes: BaseThemes) -> Sequence[int]:
+    if isinstance(base_themes.themes, Catalog):
+        # already a flat block, no need to materialize the themes
+        return base_themes.themes.colors
+
+    return array(
+        "I",
+        (
+            int(color)
+            for theme in base_themes.themes.values()
+            for color in theme.palette.bases.values()
+        ),
+    )
+
+
+def _split_channels(column: Sequence[int]) -> tuple[Column, Column, Column]:
+    return (
+        [float(value >> 16) for value in column],
+        [float((value >> 8) & 0xFF) for value in column],
+        [float(value & 0xFF) for value in column],
+    )
+
+
+def _lerp(start: Column, end: Column, t: float) -> Column:
+    return [a + (b - a) * t for a, b in zip(start, end)]
+
+
+def extended_color_block(terminal_colors: Sequence[int]) -> array:
+    """Colors 16-255 for every row of a flat block of 16 terminal colors"""
+    num_rows = len(terminal_colors) // 16
+    steps = [n / (CUBE_SIZE - 1) for n in range(CUBE_SIZE)]
+
+    # corners of the cube are the normal colors, indexed by red=1, green=2, blue=4
+    corners = [_split_channels(terminal_colors[n::16]) for n in range(8)]
+
+    result = array("I", bytes(4 * num_rows * 240))
+    for channel in range(3):
+        corner = [corners[n][channel] for n in range(8)]
+
+        # interpolate along red, then green, then blue
+        edges = {
+            (gb, r): _lerp(corner[gb], corner[gb | 1], steps[r])
+            for gb, r in product([0, 2, 4, 6], range(CUBE_SIZE))
+        }
+        faces = {
+            (b, r, g): _lerp(edges[(b, r)], edges[(b | 2, r)], steps[g])
+            for b, r, g in product([0, 4], range(CUBE_SIZE), range(CUBE_SIZE))
+        }
+
+        for r, g, b in product(range(CUBE_SIZE), repeat=3):
+            column = _lerp(faces[(0, r, g)], faces[(4, r, g)], steps[b])
+            _write_channel(result, 36 * r + 6 * g + b, channel, column)
+
+        for n in range(GRAY_STEPS):
+            column = _lerp(corner[0], corner[7], (n + 1) / (GRAY_STEPS + 1))
+            _write_channel(result, 216 + n, channel, column)
+
+    return result
+
+
+def _write_channel(result: array, slot: int, channel: int, column: Column) -> None:
+    shift = 16 - 8 * channel
+    rows = result[slot::240]
+    result[slot::240] = array(
+        "I", [row | (round(value) << shift) for row, value in zip(rows, column)]
+    )
+
+    return None
+
+
+def xterm_256_block(colors: Sequence[int], palette_type: Type[BasePalette]) -> array:
+    """All 256 colors for every palette in a flat block of base colors"""
+    terminal_colors = terminal_color_block(colors, palette_type)
+    extended = extended_color_block(terminal_colors)
+
+    num_rows = len(terminal_colors) // 16
+    result = array("I", bytes(4 * num_rows * 256))
+    for slot in range(16):
+        result[slot::256] = terminal_colors[slot::16]
+    for slot in range(240):
+        result[16 + slot :: 256] = extended[slot::240]
+
+    return result
+
+
+def catalog_xterm_256(base_themes: BaseThemes) -> dict[str, list[Color]]:
+    """The 256-color palette of every theme, computed in a single batch"""
+    block = xterm_256_block(palette_color_block(base_themes), base_themes.palette_type)
+
+    return {
+        name: [Color.from_int(value) for value in block[256 * n : 256 * (n + 1)]]
+        for n, name in enumerate(base_themes.themes)
+    }
+
+
+def to_xterm_256(palette: BasePalette) -> list[Color]:
+    colors = [int(color) for color in palette.bases.values()]
+    return [Color.from_int(value) for value in xterm_256_block(colors, type(palette))]
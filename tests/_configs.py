@@ -0,0 +1,88 @@
+"""Minimal app configs, with the settings each applier rewrites"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from basethemes.applier import basic_kitty_mapping, basic_sketchy_mapping
+from basethemes.foo import APPLIER_CONFIGS
+
+
+def write_kitty_config(config_file: Path, num_lines: int) -> None:
+    lines = ["#: kitty.conf generated for benchmarking\n"]
+    lines += [f"# color{n} #000000\n" for n in range(16)]
+    lines += [f"{name} #000000\n" for name in basic_kitty_mapping.__dict__]
+
+    for n in range(num_lines):
+        if n % 3 == 0:
+            lines.append(f"#: documentation for setting_{n}\n")
+        elif n % 3 == 1:
+            lines.append(f"map ctrl+shift+f{n} launch --cwd=current\n")
+        else:
+            lines.append(f"# setting_{n} {n}\n")
+
+    config_file.write_text("".join(lines))
+    return None
+
+
+def write_sketchybar_config(config_file: Path, num_lines: int) -> None:
+    lines = ["return {\n"]
+    for n in range(num_lines):
+        lines.append(f"  -- padding {n}\n")
+
+    scalars = [
+        key for key in basic_sketchy_mapping if not key.startswith(("bar", "popup"))
+    ]
+    lines += [f"  {name} = 0xff000000,\n" for name in scalars]
+
+    for table in ["bar", "popup"]:
+        lines += [
+            f"  {table} = {{\n",
+            "    bg = 0xf0000000,\n",
+            "    border = 0xff000000,\n",
+            "  },\n",
+        ]
+
+    lines.append("}\n")
+    config_file.write_text("".join(lines))
+    return None
+
+
+def write_borders_config(config_file: Path, num_lines: int) -> None:
+    lines = ["#!/bin/bash\n", "options=(\n", "\tstyle=round\n"]
+    lines += [f"\t# option {n}\n" for n in range(num_lines)]
+    lines += [
+        "\tactive_color=0xff000000\n",
+        "\tinactive_color=0xff000000\n",
+        ")\n",
+        'borders "${options[@]}"\n',
+    ]
+
+    config_file.write_text("".join(lines))
+    return None
+
+
+def write_neovim_config(config_file: Path, num_lines: int) -> None:
+    lines = [f"-- line {n}\n" for n in range(num_lines)]
+    lines.append('local base16_theme = "default"\n')
+
+    config_file.write_text("".join(lines))
+    return None
+
+
+CONFIG_WRITERS = {
+    "kitty": write_kitty_config,
+    "sketchybar": write_sketchybar_config,
+    "lazyborder": write_borders_config,
+    "neovim": write_neovim_config,
+}
+
+
+def write_config_root(config_root: Path, num_lines: int = 0) -> None:
+    """Writes a config for every applier, at the same paths as under ~/.config"""
+    for applier_type, config_file in APPLIER_CONFIGS:
+        path = config_root / config_file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        CONFIG_WRITERS[applier_type.app_name](path, num_lines)
+
+    return None
@@ -1,7 +1,16 @@
-"""Hypothesis strategies for generating test cases"""
-from hypothesis.strategies import text, SearchStrategy, lists
+"""Hypothesis strategies, and theme factories, for generating test cases"""
+from hypothesis.strategies import (
+    text,
+    SearchStrategy,
+    lists,
+    fixed_dictionaries,
+    just,
+    sampled_from,
+)
 
-from string import hexdigits
+from pathlib import Path
+from string import hexdigits, ascii_letters
+from typing import Iterable
 
 from basethemes import color as _color
 from basethemes import base as _base
@@ -37,3 +46,69 @@ def _palette_from_colors(colors: list[str]) -> _base.BasePalette:
 valid_color_string = hex_string(size=6)
 color = valid_color_string.map(_color.Color)
 palette = lists(valid_color_string, min_size=1, max_size=24).map(_palette_from_colors)
+
+
+def raw_scheme(palette_length: int) -> SearchStrategy[dict]:
+    """A scheme as it would be parsed from a tinted-theming yaml file"""
+    bases = lists(
+        valid_color_string, min_size=palette_length, max_size=palette_length
+    ).map(
+        lambda colors: {
+            f"base{_base.int_to_base_key(n)}": f"#{color.lower()}"
+            for n, color in enumerate(colors)
+        }
+    )
+
+    return fixed_dictionaries(
+        {
+            "system": just(f"base{palette_length}"),
+            "name": text(alphabet=ascii_letters + " ", min_size=1, max_size=24),
+            "author": text(alphabet=ascii_letters + " ", max_size=32),
+            "variant": sampled_from(["dark", "light"]),
+            "palette": bases,
+        }
+    )
+
+
+base16_scheme = raw_scheme(16)
+base24_scheme = raw_scheme(24)
+
+
+BASE16_KEYS = [f"base0{k}" for k in "0123456789ABCDEF"]
+
+
+def solid_palette(hex: str) -> dict[str, str]:
+    return {key: f"#{hex}" for key in BASE16_KEYS}
+
+
+def make_theme(
+    name: str = "Test Theme",
+    palette: dict[str, str] | str | None = None,
+    author: str = "",
+    variant: str = "dark",
+    slug: str | None = None,
+) -> _base.BaseTheme:
+    """A base16 theme, by default with a distinct gray for every base
+
+    `palette` is either every base's color, or a single hex filling every base.
+    """
+    if palette is None:
+        palette = {key: f"#{key[-1] * 6}" for key in BASE16_KEYS}
+    elif isinstance(palette, str):
+        palette = solid_palette(palette)
+
+    return _base.BaseTheme(
+        file=Path(f"base16/{name}.yaml"),
+        author=author,
+        name=name,
+        palette=_base.Base16Palette(**palette),
+        system="base16",
+        variant=variant,
+        slug=slug,
+    )
+
+
+def make_themes(themes: Iterable[_base.BaseTheme]) -> _base.BaseThemes:
+    return _base.BaseThemes(
+        palette_type=_base.Base16Palette, themes={theme.name: theme for theme in themes}
+    )
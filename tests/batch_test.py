@@ -0,0 +1,40 @@
+import pytest
+
+from basethemes.batch import apply_to_roots
+
+from ._configs import write_config_root
+
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_apply_to_roots(tmp_path, theme, use_processes, capfd):
+    roots = [tmp_path / f"home-{n}" for n in range(4)]
+    for root in roots:
+        write_config_root(root)
+
+    results = apply_to_roots(theme, roots, max_workers=2, use_processes=use_processes)
+
+    assert [result.config_root for result in results] == roots
+    assert all(result.ok for result in results)
+    assert capfd.readouterr().out == ""  # left to the per-root summary
+
+    for root in roots:
+        assert "color0 #000000" in (root / "kitty/kitty.conf").read_text()
+        assert "active_color=0xffbbbbbb" in (root / "borders/bordersrc").read_text()
+        assert '"test-theme"' in (root / "nvim/lua/plugins/base16.lua").read_text()
+
+
+def test_failures_are_per_root(tmp_path, theme):
+    good, missing_kitty = tmp_path / "good", tmp_path / "missing-kitty"
+    write_config_root(good)
+    write_config_root(missing_kitty)
+    (missing_kitty / "kitty/kitty.conf").unlink()
+
+    results = apply_to_roots(theme, [missing_kitty, good])
+
+    assert results[1].ok
+    assert list(results[0].errors) == ["kitty"]
+    assert isinstance(results[0].errors["kitty"], FileNotFoundError)
+
+    # other apps in the failing root were still themed
+    text = (missing_kitty / "borders/bordersrc").read_text()
+    assert "active_color=0xffbbbbbb" in text
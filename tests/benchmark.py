@@ -0,0 +1,388 @@
+"""Benchmarks for catalog loading, color parsing and applying themes
+
+Run from the repository root, saving results as json:
+
+    python -m tests.benchmark run --output bench.json
+
+and compare a later run against a saved baseline:
+
+    python -m tests.benchmark compare bench.json new.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable
+
+import yaml
+from hypothesis.errors import NonInteractiveExampleWarning
+
+from basethemes.applier import (
+    ThemeApplier,
+    KittyApplier,
+    NeoVimApplier,
+    SketchyBarApplier,
+    LazyBordersApplier,
+)
+from basethemes.base import Base16Palette, Base24Palette, BaseTheme, BaseThemes
+from basethemes.color import Color
+from basethemes.export import FORMATS, export_themes
+
+from . import _strats
+from ._configs import (
+    write_kitty_config,
+    write_sketchybar_config,
+    write_borders_config,
+    write_neovim_config,
+    write_config_root,
+)
+
+# number of distinct examples drawn from each strategy, which are then recycled
+# to build catalogs of arbitrary size
+EXAMPLE_POOL_SIZE = 64
+
+
+@dataclass
+class BenchResult:
+    name: str
+    n: int  # number of operations timed per repeat
+    repeats: int
+    min: float
+    median: float
+    max: float
+
+    @property
+    def per_op(self) -> float:
+        return self.min / self.n
+
+
+def timeit(
+    name: str, func: Callable[[], object], n: int = 1, repeats: int = 5
+) -> BenchResult:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return BenchResult(
+        name=name,
+        n=n,
+        repeats=repeats,
+        min=min(timings),
+        median=statistics.median(timings),
+        max=max(timings),
+    )
+
+
+def draw_examples(strategy, count: int = EXAMPLE_POOL_SIZE) -> list:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", NonInteractiveExampleWarning)
+        return [strategy.example() for _ in range(count)]
+
+
+def write_catalog(base_dir: Path, schemes: list[dict], num_themes: int) -> None:
+    base_dir.mkdir(parents=True, exist_ok=True)
+
+    for n in range(num_themes):
+        scheme = dict(schemes[n % len(schemes)])
+        scheme["name"] = f"{scheme['name'].strip() or 'theme'} {n}"
+        scheme["slug"] = f"theme-{n}"
+
+        with open(base_dir / f"theme-{n}.yaml", "w") as f:
+            yaml.safe_dump(scheme, f)
+
+    return None
+
+
+def without_reload(applier: ThemeApplier) -> ThemeApplier:
+    """Replace the reload with a no-op, as there is no running app to reload"""
+    setattr(applier, "reload_config", lambda: None)
+    return applier
+
+
+def run_benchmarks(
+    num_themes: int, num_config_lines: int, repeats: int
+) -> list[BenchResult]:
+    results: list[BenchResult] = []
+
+    hexes = [f"#{hex}" for hex in draw_examples(_strats.valid_color_string)]
+    colors = [hexes[n % len(hexes)] for n in range(num_themes * 16)]
+    results.append(
+        timeit(
+            "color.construct",
+            lambda: [Color(hex) for hex in colors],
+            n=len(colors),
+            repeats=repeats,
+        )
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+
+        write_catalog(root / "base16", draw_examples(_strats.base16_scheme), num_themes)
+        write_catalog(root / "base24", draw_examples(_strats.base24_scheme), num_themes)
+
+        results.append(
+            timeit(
+                "base_themes.load.base16",
+                lambda: BaseThemes(
+                    palette_type=Base16Palette, base_dir=root / "base16"
+                ),
+                n=num_themes,
+                repeats=repeats,
+            )
+        )
+        results.append(
+            timeit(
+                "base_themes.load.base24",
+                lambda: BaseThemes(
+                    palette_type=Base24Palette, base_dir=root / "base24"
+                ),
+                n=num_themes,
+                repeats=repeats,
+            )
+        )
+
+        base16_themes = BaseThemes(palette_type=Base16Palette, base_dir=root / "base16")
+        palettes = [theme.palette for theme in base16_themes.themes.values()]
+
+        results.append(
+            timeit(
+                "base_palette.index.int",
+                lambda: [palette[n] for palette in palettes for n in range(16)],
+                n=len(palettes) * 16,
+                repeats=repeats,
+            )
+        )
+        results.append(
+            timeit(
+                "base_palette.index.base_name",
+                lambda: [
+                    palette[f"base0{k}"]
+                    for palette in palettes
+                    for k in "0123456789ABCDEF"
+                ],
+                n=len(palettes) * 16,
+                repeats=repeats,
+            )
+        )
+        results.append(
+            timeit(
+                "base_themes.filtered",
+                lambda: base16_themes.filtered(variant="dark"),
+                n=num_themes,
+                repeats=repeats,
+            )
+        )
+        results.append(
+            timeit(
+                "base_themes.filter",
+                lambda: base16_themes.filter(lambda theme: "1" in theme.name),
+                n=num_themes,
+                repeats=repeats,
+            )
+        )
+
+        results.append(
+            timeit(
+                "export.zip",
+                lambda: export_themes(base16_themes, root / "export.zip"),
+                n=num_themes * len(FORMATS),
+                repeats=repeats,
+            )
+        )
+
+        theme = next(iter(base16_themes.themes.values()))
+        results += bench_appliers(root / "config", theme, num_config_lines, repeats)
+        results += bench_cli_cold_start(root, theme.name, root / "home", repeats)
+
+    return results
+
+
+# runs the cli with every app's reload stubbed out, as no apps are running
+STUBBED_RELOAD_CLI = """
+import sys
+from basethemes.foo import APPLIER_CONFIGS
+from basethemes.cli import main
+
+for applier_type, _ in APPLIER_CONFIGS:
+    applier_type.reload_config = lambda self: None
+
+sys.exit(main(sys.argv[1:]))
+"""
+
+
+def bench_cli_cold_start(
+    repo_dir: Path, theme_name: str, home_dir: Path, repeats: int
+) -> list[BenchResult]:
+    """Times fresh interpreters, as the cli is run from hotkeys and login scripts"""
+    config_dir = home_dir / ".config"
+    write_config_root(config_dir)
+
+    commands = {
+        "cli.cold_start.import": ["-c", "import basethemes.cli"],
+        "cli.cold_start.list": [
+            "-m",
+            "basethemes",
+            "--repo-dir",
+            str(repo_dir),
+            "list",
+        ],
+        "cli.cold_start.apply": [
+            "-c",
+            STUBBED_RELOAD_CLI,
+            "--repo-dir",
+            str(repo_dir),
+            "--history-dir",
+            str(home_dir / "history"),
+            "apply",
+            theme_name,
+            "--config-dir",
+            str(config_dir),
+        ],
+    }
+
+    return [
+        timeit(
+            name,
+            lambda: subprocess.run(
+                [sys.executable, *command], check=True, stdout=subprocess.DEVNULL
+            ),
+            n=1,
+            repeats=repeats,
+        )
+        for name, command in commands.items()
+    ]
+
+
+def bench_appliers(
+    config_dir: Path, theme: BaseTheme, num_config_lines: int, repeats: int
+) -> list[BenchResult]:
+    config_dir.mkdir(parents=True, exist_ok=True)
+
+    configs: list[tuple[type[ThemeApplier], Callable[[Path, int], None], str]] = [
+        (KittyApplier, write_kitty_config, "kitty.conf"),
+        (SketchyBarApplier, write_sketchybar_config, "colors.lua"),
+        (LazyBordersApplier, write_borders_config, "bordersrc"),
+        (NeoVimApplier, write_neovim_config, "base16.lua"),
+    ]
+
+    results = []
+    for applier_type, write_config, file_name in configs:
+        config_file = config_dir / file_name
+        write_config(config_file, num_config_lines)
+
+        def apply() -> None:
+            applier = without_reload(applier_type(config_file=config_file))
+            with contextlib.redirect_stdout(io.StringIO()):
+                applier.apply_theme(theme)
+
+        results.append(
+            timeit(
+                f"applier.{applier_type.app_name}.apply_theme",
+                apply,
+                n=1,
+                repeats=repeats,
+            )
+        )
+
+    return results
+
+
+def compare(baseline: dict, current: dict) -> list[tuple[str, float, float, float]]:
+    """Returns (name, baseline, current, ratio) for every shared benchmark"""
+    rows = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+
+        before = baseline["results"][name]["min"]
+        after = result["min"]
+        rows.append((name, before, after, after / before if before else float("inf")))
+
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m tests.benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmarks")
+    run.add_argument("--output", "-o", type=Path, help="json file to save results")
+    run.add_argument("--themes", type=int, default=2000)
+    run.add_argument("--config-lines", type=int, default=5000)
+    run.add_argument("--repeats", type=int, default=5)
+
+    cmp = commands.add_parser("compare", help="compare two saved results")
+    cmp.add_argument("baseline", type=Path)
+    cmp.add_argument("current", type=Path)
+    cmp.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="fractional slowdown that counts as a regression",
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run_benchmarks(
+            num_themes=args.themes,
+            num_config_lines=args.config_lines,
+            repeats=args.repeats,
+        )
+
+        for result in results:
+            print(
+                f"{result.name:<40} {result.min * 1e3:>10.3f} ms"
+                f" {result.per_op * 1e6:>10.3f} us/op"
+            )
+
+        if args.output:
+            output = {
+                "meta": {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "themes": args.themes,
+                    "config_lines": args.config_lines,
+                    "repeats": args.repeats,
+                },
+                "results": {result.name: asdict(result) for result in results},
+            }
+            args.output.write_text(json.dumps(output, indent=2))
+
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    current = json.loads(args.current.read_text())
+
+    has_regression = False
+    for name, before, after, ratio in compare(baseline, current):
+        flag = ""
+        if ratio > 1 + args.threshold:
+            flag = "  REGRESSION"
+            has_regression = True
+
+        print(
+            f"{name:<40} {before * 1e3:>10.3f} ms -> {after * 1e3:>10.3f} ms"
+            f" ({ratio:.2f}x){flag}"
+        )
+
+    return 1 if has_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
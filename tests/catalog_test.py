@@ -0,0 +1,66 @@
+import pytest
+from hypothesis import given, settings, HealthCheck, strategies as st
+
+from basethemes.base import Base16Palette, BaseThemes
+from basethemes.catalog import Catalog, write_catalog
+
+from . import _strats
+
+
+def scheme_themes(schemes: list[dict]) -> BaseThemes:
+    return _strats.make_themes(
+        _strats.make_theme(
+            f"{scheme['name']} {n}",
+            scheme["palette"],
+            author=scheme["author"],
+            variant=scheme["variant"],
+            slug=f"theme-{n}" if n % 2 else None,
+        )
+        for n, scheme in enumerate(schemes)
+    )
+
+
+@settings(suppress_health_check=[HealthCheck.function_scoped_fixture])
+@given(schemes=st.lists(_strats.base16_scheme, max_size=8))
+def test_round_trip(tmp_path, schemes: list[dict]):
+    base_themes = scheme_themes(schemes)
+    catalog_file = tmp_path / "base16.catalog"
+    write_catalog(base_themes, catalog_file)
+
+    with Catalog(catalog_file) as catalog:
+        assert catalog.palette_type is Base16Palette
+        assert list(catalog) == base_themes.list_theme_names()
+
+        for name, expected in base_themes.themes.items():
+            theme = catalog[name]
+            assert theme.file == expected.file
+            assert theme.author == expected.author
+            assert theme.slug == expected.slug
+            assert theme.variant == expected.variant
+            assert {k: v.hex for k, v in theme.palette.bases.items()} == {
+                k: v.hex for k, v in expected.palette.bases.items()
+            }
+
+
+def test_colors_block(tmp_path):
+    palette = {f"base0{k}": f"#00000{k}" for k in "0123456789ABCDEF"}
+    scheme = {"system": "base16", "name": "a", "author": "", "variant": "dark"}
+    base_themes = scheme_themes([scheme | {"palette": palette}] * 2)
+
+    catalog_file = tmp_path / "base16.catalog"
+    write_catalog(base_themes, catalog_file)
+
+    with Catalog(catalog_file) as catalog:
+        assert len(catalog.colors) == 32
+        assert list(catalog.palette_colors(1)) == list(range(16))
+
+        filtered = catalog.to_base_themes().filtered(variant="dark")
+        assert len(filtered) == 2
+
+
+def test_not_a_catalog(tmp_path):
+    bad_file = tmp_path / "bad.catalog"
+    bad_file.write_bytes(b"\0" * 64)
+
+    with pytest.raises(ValueError, match="not a theme catalog"):
+        Catalog(bad_file)
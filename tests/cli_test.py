@@ -0,0 +1,101 @@
+import subprocess
+import sys
+
+import pytest
+import yaml
+from hypothesis import given, settings, HealthCheck
+
+from basethemes.base import read_theme_metadata, METADATA_KEYS
+from basethemes.cli import main, find_theme_file
+
+from . import _strats
+
+
+def write_scheme(path, scheme: dict) -> None:
+    with open(path, "w") as f:
+        yaml.safe_dump(scheme, f, sort_keys=False)
+
+
+@pytest.fixture
+def repo_dir(tmp_path):
+    base_dir = tmp_path / "base16"
+    base_dir.mkdir()
+
+    palette = {f"base0{k}": "#000000" for k in "0123456789ABCDEF"}
+    for name, author, variant in [
+        ("Gotham", "Andrea Leopardi", "dark"),
+        ("Catppuccin Latte", "https://github.com/catppuccin", "light"),
+        ("Catppuccin Mocha", "https://github.com/catppuccin", "dark"),
+    ]:
+        scheme = {
+            "system": "base16",
+            "name": name,
+            "author": author,
+            "variant": variant,
+            "palette": palette,
+        }
+        write_scheme(base_dir / f"{name.lower().replace(' ', '-')}.yaml", scheme)
+
+    return tmp_path
+
+
+@settings(suppress_health_check=[HealthCheck.function_scoped_fixture])
+@given(scheme=_strats.base16_scheme)
+def test_read_theme_metadata_matches_yaml(tmp_path, scheme: dict):
+    theme_file = tmp_path / "theme.yaml"
+    write_scheme(theme_file, scheme)
+
+    expected = {k: v for k, v in scheme.items() if k in METADATA_KEYS}
+    assert read_theme_metadata(theme_file) == expected
+
+
+def test_list_variant(repo_dir, capsys):
+    assert main(["--repo-dir", str(repo_dir), "list", "--variant", "dark"]) == 0
+    assert capsys.readouterr().out.splitlines() == ["Catppuccin Mocha", "Gotham"]
+
+
+def test_search_author(repo_dir, capsys):
+    assert main(["--repo-dir", str(repo_dir), "search", "catppuccin"]) == 0
+    assert capsys.readouterr().out.splitlines() == [
+        "Catppuccin Latte",
+        "Catppuccin Mocha",
+    ]
+
+    assert main(["--repo-dir", str(repo_dir), "search", "missing"]) == 1
+
+
+def test_match_apply_without_themes(tmp_path, capsys):
+    (tmp_path / "base16").mkdir()
+    image = tmp_path / "wallpaper.ppm"
+    image.write_bytes(b"P6\n2 1\n255\n" + bytes([0, 0, 0, 255, 255, 255]))
+
+    assert main(["--repo-dir", str(tmp_path), "match", str(image), "--apply"]) == 1
+    assert "No themes to match against" in capsys.readouterr().err
+
+
+def test_find_theme_file(repo_dir):
+    base_dir = repo_dir / "base16"
+
+    assert find_theme_file(base_dir, "Gotham") == base_dir / "gotham.yaml"
+    assert find_theme_file(base_dir, "catppuccin-mocha").name == "catppuccin-mocha.yaml"
+
+    (base_dir / "gotham.yaml").rename(base_dir / "renamed.yaml")
+    assert find_theme_file(base_dir, "Gotham") == base_dir / "renamed.yaml"
+
+    with pytest.raises(KeyError, match="Could not find theme"):
+        find_theme_file(base_dir, "missing")
+
+
+def test_import_is_lazy():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, basethemes.cli; print('git' in sys.modules, 'yaml' in sys.modules)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.split() == ["False", "False"]
@@ -46,3 +46,14 @@ def test_invalid_chars(valid_hex: str, bad_char: str):
 
     with pytest.raises(ValueError, match="invalid chars"):
         Color(invalid_hex)
+
+
+@given(color=_strats.color)
+def test_int_round_trip(color: Color):
+    assert Color.from_int(int(color)).hex == color.hex
+
+
+@given(value=st.one_of(st.integers(max_value=-1), st.integers(min_value=0x1000000)))
+def test_from_int_out_of_range(value: int):
+    with pytest.raises(ValueError, match="out of range"):
+        Color.from_int(value)
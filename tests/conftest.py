@@ -0,0 +1,10 @@
+import pytest
+
+from basethemes.base import BaseTheme
+
+from . import _strats
+
+
+@pytest.fixture
+def theme() -> BaseTheme:
+    return _strats.make_theme()
@@ -0,0 +1,115 @@
+import json
+import plistlib
+import tarfile
+import tomllib
+import zipfile
+
+import pytest
+from hypothesis import given, settings, HealthCheck
+
+from basethemes.base import BaseThemes
+from basethemes.catalog import Catalog, write_catalog
+from basethemes.color import Color
+from basethemes.export import FORMATS, compile_template, export_themes, theme_context
+
+from . import _strats
+
+
+def make_themes(n: int) -> BaseThemes:
+    return _strats.make_themes(
+        _strats.make_theme(
+            f'Theme "{i}"',
+            {key: f"#{i:02x}{key[-1] * 4}" for key in _strats.BASE16_KEYS},
+            author="<someone> & co",
+        )
+        for i in range(n)
+    )
+
+
+def test_compile_template():
+    template = compile_template("a {{ x }} b {{y.hex}}{{ y.rf }}")
+    context = {"x": "<text>", "y": Color("#FF0000")}
+
+    assert template.render(context, str.upper) == "a <TEXT> b ff00001.000000"
+
+    with pytest.raises(ValueError):
+        compile_template("{{ x.nope }}")
+
+    with pytest.raises(ValueError):
+        compile_template("{{ x.hex }}").render(context, str)
+
+
+@settings(suppress_health_check=[HealthCheck.function_scoped_fixture])
+@given(scheme=_strats.base16_scheme)
+def test_formats_parse(scheme: dict):
+    theme = _strats.make_theme(
+        scheme["name"],
+        scheme["palette"],
+        author=scheme["author"],
+        variant=scheme["variant"],
+    )
+    context = theme_context(theme)
+    background = f"#{theme.palette['base00'].hex.lower()}"
+
+    alacritty = tomllib.loads(FORMATS["alacritty"].render(context))
+    assert alacritty["colors"]["primary"]["background"] == background
+
+    wezterm = tomllib.loads(FORMATS["wezterm"].render(context))
+    assert wezterm["metadata"]["name"] == theme.name
+    assert len(wezterm["colors"]["brights"]) == 8
+
+    vscode = json.loads(FORMATS["vscode"].render(context))
+    assert vscode["name"] == theme.name
+    assert vscode["colors"]["editor.background"] == background
+
+    iterm = plistlib.loads(FORMATS["iterm2"].render(context).encode())
+    red = int(theme.to_terminal_colors()[1].red, 16) / 255
+    assert iterm["Ansi 1 Color"]["Red Component"] == pytest.approx(red, abs=1e-6)
+
+
+def test_export_to_directory(tmp_path):
+    written = export_themes(
+        make_themes(5), tmp_path / "out", use_processes=False, chunk_size=2
+    )
+
+    assert written == 5 * len(FORMATS)
+    assert {path.name for path in (tmp_path / "out").iterdir()} == set(FORMATS)
+    assert (tmp_path / "out/kitty/theme-0.conf").read_text().startswith("# Theme")
+
+
+@pytest.mark.parametrize("archive", ["out.tar", "out.tar.gz", "out.zip"])
+def test_export_to_archive(tmp_path, archive):
+    output = tmp_path / archive
+    export_themes(
+        make_themes(3), output, format_names=["css", "xresources"], max_workers=2
+    )
+
+    if archive.endswith(".zip"):
+        with zipfile.ZipFile(output) as f:
+            names = f.namelist()
+            css = f.read("css/theme-1.css").decode()
+    else:
+        with tarfile.open(output) as f:
+            names = f.getnames()
+            css = f.extractfile("css/theme-1.css").read().decode()
+
+    assert len(names) == 6
+    assert "  --base00: #010000;\n" in css
+
+
+def test_export_from_catalog(tmp_path):
+    catalog_file = tmp_path / "base16.catalog"
+    write_catalog(make_themes(4), catalog_file)
+
+    with Catalog(catalog_file) as catalog:
+        written = export_themes(
+            catalog.to_base_themes(), tmp_path / "out", format_names=["css"]
+        )
+        assert catalog._themes == {}  # read without caching
+
+    assert written == 4
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        export_themes(make_themes(1), tmp_path, format_names=["nope"])
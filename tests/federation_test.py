@@ -0,0 +1,200 @@
+import os
+from pathlib import Path
+
+import yaml
+from git import Actor, Repo
+
+from basethemes import cli
+from basethemes.base import Base16Palette
+from basethemes.cli import main
+from basethemes.federation import (
+    Source,
+    federate,
+    load_source,
+    parse_source,
+    source_clone_dir,
+)
+
+
+def write_schemes(root: Path, schemes: dict[str, str]) -> Path:
+    """One base16 scheme per name, with every base set to the given color"""
+    base_dir = root / "base16"
+    base_dir.mkdir(parents=True, exist_ok=True)
+
+    for name, color in schemes.items():
+        scheme = {
+            "system": "base16",
+            "name": name,
+            "author": root.name,
+            "variant": "dark",
+            "palette": {f"base0{k}": f"#{color}" for k in "0123456789ABCDEF"},
+        }
+        with open(base_dir / f"{name.lower()}.yaml", "w") as f:
+            yaml.safe_dump(scheme, f, sort_keys=False)
+
+    return root
+
+
+def test_parse_source():
+    assert parse_source("ours=~/schemes") == Source("ours", "~/schemes")
+    assert parse_source("/srv/schemes/") == Source("schemes", "/srv/schemes/")
+    assert parse_source("https://github.com/org/our-schemes.git") == Source(
+        "our-schemes", "https://github.com/org/our-schemes.git"
+    )
+
+
+def test_priority_and_dedupe(tmp_path):
+    ours = write_schemes(tmp_path / "ours", {"Gotham": "111111", "Ours": "222222"})
+    upstream = write_schemes(
+        tmp_path / "upstream",
+        {"Gotham": "999999", "Copy": "222222", "Upstream": "333333"},
+    )
+
+    federation = federate(
+        [Source("ours", str(ours)), Source("upstream", str(upstream))],
+        palette_type=Base16Palette,
+        cache_dir=tmp_path / "cache",
+    )
+
+    assert federation.origins == {
+        "Gotham": "ours",
+        "Ours": "ours",
+        "Upstream": "upstream",
+    }
+    assert federation.base_themes["Gotham"].author == "ours"
+    assert federation.shadowed == [("Gotham", "upstream")]
+    assert federation.duplicates == [("Copy", "upstream", "Ours")]
+
+
+def test_unchanged_sources_are_cached(tmp_path):
+    ours = write_schemes(tmp_path / "ours", {"Ours": "222222"})
+    upstream = write_schemes(tmp_path / "upstream", {"Upstream": "333333"})
+    sources = [Source("ours", str(ours)), Source("upstream", str(upstream))]
+    cache_dir = tmp_path / "cache"
+
+    first = federate(sources, palette_type=Base16Palette, cache_dir=cache_dir)
+    assert first.cached == []
+
+    second = federate(sources, palette_type=Base16Palette, cache_dir=cache_dir)
+    assert second.cached == ["ours", "upstream"]
+    assert second.base_themes["Ours"].palette["base00"].hex == "222222"
+
+    write_schemes(ours, {"Ours": "444444"})
+    stat = (ours / "base16/ours.yaml").stat()
+    os.utime(ours / "base16/ours.yaml", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    third = federate(sources, palette_type=Base16Palette, cache_dir=cache_dir)
+    assert third.cached == ["upstream"]
+    assert third.base_themes["Ours"].palette["base00"].hex == "444444"
+
+    # only the latest catalog of each source is kept
+    assert len(list((cache_dir / "catalogs").iterdir())) == 2
+
+
+def test_sources_are_keyed_by_location(tmp_path):
+    ours = write_schemes(tmp_path / "ours/schemes", {"Ours": "222222"})
+    theirs = write_schemes(tmp_path / "theirs/schemes", {"Theirs": "333333"})
+    sources = [Source("schemes", str(ours)), Source("schemes", str(theirs))]
+    cache_dir = tmp_path / "cache"
+
+    urls = ["https://example.com/ours/schemes", "https://example.com/theirs/schemes"]
+    assert len({source_clone_dir(parse_source(url), cache_dir) for url in urls}) == 2
+
+    for source in sources:
+        assert not load_source(source, Base16Palette, "base16", cache_dir)[1]
+
+    # loading one doesn't replace the other's catalog
+    for source, name in zip(sources, ["Ours", "Theirs"]):
+        catalog, cached = load_source(source, Base16Palette, "base16", cache_dir)
+        assert cached
+        with catalog:
+            assert list(catalog.names) == [name]
+
+
+def test_cli_rejects_source_named_upstream(tmp_path, capsys):
+    ours = write_schemes(tmp_path / "ours", {"Ours": "222222"})
+
+    assert main(["--source", f"upstream={ours}", "list"]) == 1
+    assert "not upstream" in capsys.readouterr().err
+
+    assert main(["--source", f"ours={ours}", "--source", str(ours), "list"]) == 1
+
+
+def test_cli_sources(tmp_path, capsys):
+    ours = write_schemes(tmp_path / "ours", {"Gotham": "111111", "Ours": "222222"})
+    upstream = write_schemes(tmp_path / "upstream", {"Gotham": "999999"})
+
+    args = ["--repo-dir", str(upstream), "--cache-dir", str(tmp_path / "cache")]
+    args += ["--source", f"ours={ours}"]
+
+    assert main(args + ["list"]) == 0
+    assert capsys.readouterr().out.splitlines() == ["Gotham", "Ours"]
+
+    assert main(args + ["sources"]) == 0
+    assert capsys.readouterr().out.splitlines() == [
+        "    2  ours (cached)",
+        "    0  upstream (cached)",
+        "shadowed   Gotham from upstream",
+    ]
+
+
+def test_cli_search_and_apply_use_sources(tmp_path, capsys):
+    ours = write_schemes(tmp_path / "ours", {"Ours": "222222"})
+    upstream = write_schemes(tmp_path / "upstream", {"Gotham": "999999"})
+
+    args = ["--repo-dir", str(upstream), "--cache-dir", str(tmp_path / "cache")]
+    args += ["--source", f"ours={ours}"]
+
+    assert main(args + ["search", "ours"]) == 0
+    assert capsys.readouterr().out.splitlines() == ["Ours"]
+
+    roots_file = tmp_path / "roots"
+    roots_file.write_text("")
+    assert main(args + ["apply-batch", "Ours", str(roots_file)]) == 0
+    assert "applied Ours to 0/0 roots" in capsys.readouterr().out
+
+
+def bare_repo(path: Path, schemes: dict[str, str]) -> tuple[Repo, str]:
+    """A working repo of schemes, and the url of a bare clone of it"""
+    work = Repo.init(path)
+    write_schemes(path, schemes)
+    work.index.add(["base16"])
+    author = Actor("test", "test@example.com")
+    work.index.commit("schemes", author=author, committer=author)
+
+    bare = path.with_suffix(".git")
+    work.clone(bare, bare=True)
+    work.create_remote("origin", str(bare))
+
+    return work, f"file://{bare}"
+
+
+def test_refresh_syncs_repo_sources(tmp_path, monkeypatch, capsys):
+    _, upstream_url = bare_repo(tmp_path / "upstream", {"Gotham": "999999"})
+    ours, ours_url = bare_repo(tmp_path / "ours", {"Ours": "222222"})
+    monkeypatch.setattr(cli, "THEME_REPO_URL", upstream_url)
+
+    args = [
+        "--repo-dir",
+        str(tmp_path / "repo"),
+        "--cache-dir",
+        str(tmp_path / "cache"),
+    ]
+    args += ["--source", f"ours={ours_url}"]
+
+    assert main(args + ["refresh"]) == 0
+    assert main(args + ["list"]) == 0
+    assert capsys.readouterr().out.splitlines()[-2:] == ["Gotham", "Ours"]
+
+    write_schemes(Path(ours.working_tree_dir), {"Newer": "333333"})
+    author = Actor("test", "test@example.com")
+    ours.index.add(["base16"])
+    ours.index.commit("newer", author=author, committer=author)
+    ours.remotes.origin.push(ours.active_branch.name)
+
+    assert main(args + ["refresh"]) == 0
+    clone_dir = source_clone_dir(Source("ours", ours_url), tmp_path / "cache")
+    assert f"refreshed {clone_dir}" in capsys.readouterr().out
+
+    assert main(args + ["list"]) == 0
+    assert capsys.readouterr().out.splitlines() == ["Gotham", "Newer", "Ours"]
@@ -0,0 +1,168 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from basethemes.base import BaseTheme
+from basethemes.applier import KittyApplier
+from basethemes.foo import APPLIER_CONFIGS, apply_theme
+from basethemes.history import History
+
+from . import _strats
+from ._configs import write_config_root
+
+
+def config_files(config_root: Path) -> dict[str, Path]:
+    return {
+        applier_type.app_name: config_root / config_file
+        for applier_type, config_file in APPLIER_CONFIGS
+    }
+
+
+def apply(history: History, config_root: Path, theme: BaseTheme) -> None:
+    """Applies and records a theme, without reloading any apps"""
+    files = config_files(config_root)
+    before = history.snapshot(files)
+
+    for applier_type, config_file in APPLIER_CONFIGS:
+        applier_type(config_file=config_root / config_file).write_theme(theme)
+
+    history.record(theme.name, files, before)
+    return None
+
+
+def read_all(config_root: Path) -> dict[str, bytes]:
+    return {app: path.read_bytes() for app, path in config_files(config_root).items()}
+
+
+def test_revert(tmp_path):
+    config_root = tmp_path / "config"
+    write_config_root(config_root)
+    (config_root / "borders/bordersrc").chmod(0o755)
+    history = History(tmp_path / "history")
+
+    original = read_all(config_root)
+    apply(history, config_root, _strats.make_theme("first", "111111"))
+    first = read_all(config_root)
+    apply(history, config_root, _strats.make_theme("second", "222222"))
+
+    assert [entry.theme_name for entry in history.entries()] == ["first", "second"]
+
+    assert history.revert(reload=False) == {}
+    assert read_all(config_root) == first
+    assert os.stat(config_root / "borders/bordersrc").st_mode & 0o777 == 0o755
+
+    assert history.revert(reload=False) == {}
+    assert read_all(config_root) == original
+    assert history.entries() == []
+
+    with pytest.raises(ValueError):
+        history.revert()
+
+
+def test_revert_steps(tmp_path):
+    config_root = tmp_path / "config"
+    write_config_root(config_root)
+    history = History(tmp_path / "history")
+
+    original = read_all(config_root)
+    for n in range(3):
+        apply(history, config_root, _strats.make_theme(f"theme {n}", f"{n}" * 6))
+
+    history.revert(steps=3, reload=False)
+    assert read_all(config_root) == original
+
+
+def test_repeated_themes_are_deduplicated(tmp_path):
+    config_root = tmp_path / "config"
+    write_config_root(config_root)
+    history = History(tmp_path / "history")
+    themes = [
+        _strats.make_theme("first", "111111"),
+        _strats.make_theme("second", "222222"),
+    ]
+
+    apply(history, config_root, themes[0])
+    apply(history, config_root, themes[1])
+    num_objects = len(list(history.objects_dir.iterdir()))
+    assert num_objects == 3 * len(APPLIER_CONFIGS)
+
+    for _ in range(5):
+        for theme in themes:
+            apply(history, config_root, theme)
+
+    assert len(history.entries()) == 12
+    assert len(list(history.objects_dir.iterdir())) == num_objects
+
+
+def test_history_is_bounded(tmp_path):
+    config_root = tmp_path / "config"
+    write_config_root(config_root)
+    history = History(tmp_path / "history", size=2)
+
+    for n in range(5):
+        apply(history, config_root, _strats.make_theme(f"theme {n}", f"{n}" * 6))
+
+    assert [entry.theme_name for entry in history.entries()] == ["theme 3", "theme 4"]
+
+    # only the configs themed by theme 2, 3 and 4 are still referenced
+    assert len(list(history.objects_dir.iterdir())) == 3 * len(APPLIER_CONFIGS)
+
+
+def test_recorded_when_reload_fails(tmp_path, monkeypatch):
+    for applier_type, _ in APPLIER_CONFIGS:
+        if applier_type is not KittyApplier:
+            monkeypatch.setattr(applier_type, "reload_config", lambda self: None)
+    monkeypatch.delenv("KITTY_PID", raising=False)
+
+    config_root = tmp_path / "config"
+    write_config_root(config_root)
+    theme = _strats.make_theme("first", "111111")
+
+    with pytest.raises(EnvironmentError, match="KITTY_PID"):
+        apply_theme(
+            _strats.make_themes([theme]),
+            theme.name,
+            config_dir=config_root,
+            history_dir=tmp_path / "history",
+        )
+
+    history = History(tmp_path / "history")
+    (entry,) = history.entries()
+    assert entry.theme_name == "first"
+    assert read_all(config_root) == {
+        app_name: history.load(change.after) for app_name, change in entry.files.items()
+    }
+
+
+def test_recorded_when_write_fails(tmp_path):
+    config_root = tmp_path / "config"
+    write_config_root(config_root)
+    history = History(tmp_path / "history")
+    apply(history, config_root, _strats.make_theme("first", "111111"))
+
+    # kitty is written last, after every other app's config has been rewritten
+    kitty = config_root / "kitty/kitty.conf"
+    kitty.write_text(
+        "".join(
+            line
+            for line in kitty.read_text().splitlines(keepends=True)
+            if not line.startswith("url_color")
+        )
+    )
+    first = read_all(config_root)
+
+    theme = _strats.make_theme("second", "222222")
+    with pytest.raises(KeyError, match="url_color"):
+        apply_theme(
+            _strats.make_themes([theme]),
+            theme.name,
+            config_dir=config_root,
+            history_dir=tmp_path / "history",
+        )
+
+    assert read_all(config_root) != first
+    assert [entry.theme_name for entry in history.entries()] == ["first", "second"]
+
+    history.revert(reload=False)
+    assert read_all(config_root) == first
@@ -0,0 +1,109 @@
+from basethemes import nvim
+from basethemes.applier import NeoVimApplier
+from basethemes.foo import APPLIER_CONFIGS, apply_theme
+
+from . import _strats
+from ._configs import write_config_root
+
+
+def filled_palette(fill: str) -> dict[str, str]:
+    return {key: f"#{fill * 4}{key[-1] * 2}" for key in _strats.BASE16_KEYS}
+
+
+def test_render_colorscheme():
+    lua = nvim.render_colorscheme(_strats.make_theme("Some Theme", filled_palette("1")))
+
+    lines = lua.splitlines()
+    assert lines[0].startswith(nvim.HASH_PREFIX)
+
+    # highlights are cleared before naming the colorscheme, as clearing unsets it
+    clear = lines.index('vim.cmd("highlight clear")')
+    name = lines.index('vim.g.colors_name = "some-theme"')
+    assert (
+        clear
+        < name
+        < lines.index('hl(0, "Normal", { fg = "#111155", bg = "#111100" })')
+    )
+    assert 'hl(0, "Normal", { fg = "#111155", bg = "#111100" })' in lua
+    assert 'hl(0, "Comment", { fg = "#111133", italic = true })' in lua
+    assert 'vim.g.terminal_color_1 = "#111188"' in lua
+
+
+def test_write_colorschemes_is_cached(tmp_path, monkeypatch):
+    base_themes = _strats.make_themes(
+        _strats.make_theme(name, filled_palette("1")) for name in ["a", "b"]
+    )
+
+    rendered = []
+    render_body = nvim.render_body
+    monkeypatch.setattr(
+        nvim, "render_body", lambda theme: rendered.append(theme) or render_body(theme)
+    )
+
+    assert nvim.write_colorschemes(base_themes, tmp_path) == 2
+    assert len(rendered) == 1  # both themes share a palette
+    assert {path.name for path in tmp_path.iterdir()} == {"a.lua", "b.lua"}
+
+    assert nvim.write_colorschemes(base_themes, tmp_path) == 0
+
+    base_themes.themes["b"] = _strats.make_theme("b", filled_palette("2"))
+    assert nvim.write_colorschemes(base_themes, tmp_path) == 1
+    assert "#222200" in (tmp_path / "b.lua").read_text()
+
+
+def colorscheme_line(name: str) -> str:
+    return (
+        'vim.api.nvim_create_autocmd("VimEnter", { callback = function() '
+        f'pcall(vim.cmd.colorscheme, "{name}") end }}) -- basethemes colorscheme\n'
+    )
+
+
+def test_applier_writes_colorscheme(tmp_path):
+    config_file = tmp_path / "base16.lua"
+    plugin = "return { config = function() use(base16_theme) end }\n"
+    config_file.write_text('local base16_theme = "default"\n' + plugin)
+
+    applier = NeoVimApplier(config_file, colorscheme_dir=tmp_path / "colors")
+    applier.apply_theme(_strats.make_theme("Gotham"))
+
+    # the plugin's variable is kept, for anything else in the file using it
+    assert config_file.read_text() == (
+        'local base16_theme = "gotham"\n' + colorscheme_line("gotham") + plugin
+    )
+    assert (tmp_path / "colors/gotham.lua").is_file()
+
+    # e.g. watch and apply-batch, which keep loading the standalone colorscheme
+    other = NeoVimApplier(config_file)
+    assert other.is_current(NeoVimApplier.render(_strats.make_theme("Gotham")))
+    other.apply_theme(_strats.make_theme("Some Theme"))
+    assert config_file.read_text() == (
+        'local base16_theme = "some-theme"\n' + colorscheme_line("some-theme") + plugin
+    )
+
+    # back to the base16 plugin once the marked line is deleted
+    config_file.write_text('local base16_theme = "some-theme"\n' + plugin)
+    NeoVimApplier(config_file).apply_theme(_strats.make_theme("Gotham"))
+    assert config_file.read_text() == 'local base16_theme = "gotham"\n' + plugin
+
+
+def test_apply_theme_with_nvim_colors(tmp_path, monkeypatch):
+    for applier_type, _ in APPLIER_CONFIGS:
+        monkeypatch.setattr(applier_type, "reload_config", lambda self: None)
+
+    config_dir = tmp_path / "config"
+    write_config_root(config_dir)
+    theme = _strats.make_theme("Gotham")
+    base_themes = _strats.make_themes([theme])
+
+    apply_theme(
+        base_themes,
+        theme.name,
+        config_dir=config_dir,
+        nvim_colors=tmp_path / "colors",
+    )
+
+    config = (config_dir / "nvim/lua/plugins/base16.lua").read_text()
+    assert config.endswith(
+        'local base16_theme = "gotham"\n' + colorscheme_line("gotham")
+    )
+    assert (tmp_path / "colors/gotham.lua").is_file()
@@ -0,0 +1,69 @@
+import io
+import re
+
+from hypothesis import given, strategies as st
+
+from basethemes.preview import (
+    RESET_SEQUENCE,
+    Preview,
+    browse,
+    preview_sequence,
+    preview_sequences,
+    wrap_for_tmux,
+)
+
+from . import _strats
+
+
+def test_preview_sequence():
+    theme = _strats.make_theme("theme")
+    sequence = preview_sequence(theme).decode()
+
+    palette = re.match(r"\x1b\]4;([^\x07]*)\x07", sequence).group(1).split(";")
+    colors = theme.to_terminal_colors()
+    assert palette == [
+        part for n in range(16) for part in (str(n), str(colors[n]).lower())
+    ]
+
+    assert "\x1b]10;#555555\x07" in sequence  # foreground, color7
+    assert "\x1b]11;#000000\x07" in sequence  # background, color0
+    assert "\x1b]12;#555555\x07" in sequence  # cursor, color7
+
+
+@given(schemes=st.lists(_strats.base16_scheme, min_size=1, max_size=8))
+def test_batched_sequences_match(schemes: list[dict]):
+    base_themes = _strats.make_themes(
+        _strats.make_theme(f"theme {n}", scheme["palette"])
+        for n, scheme in enumerate(schemes)
+    )
+
+    assert preview_sequences(base_themes) == {
+        name: preview_sequence(theme) for name, theme in base_themes.themes.items()
+    }
+
+
+def test_wrap_for_tmux():
+    assert wrap_for_tmux(b"\x1b]11;#000000\x07") == (
+        b"\x1bPtmux;\x1b\x1b]11;#000000\x07\x1b\\"
+    )
+
+
+def test_browse():
+    sequences = {"a": b"<a>", "b": b"<b>", "c": b"<c>"}
+    out = io.BytesIO()
+
+    with Preview(out, tmux=False) as preview:
+        keys = ["j", "j", "j", "x", "\x1b[A", "\r", "j"]
+        assert browse(sequences, keys, preview) == "c"
+
+    written = out.getvalue()
+    assert re.findall(rb"<(\w)>", written) == [b"a", b"b", b"c", b"a", b"c"]
+    assert written.endswith(RESET_SEQUENCE)
+
+
+def test_browse_quit():
+    out = io.BytesIO()
+    preview = Preview(out, tmux=False)
+
+    assert browse({"a": b"<a>"}, ["q", "\r"], preview) is None
+    assert browse({}, ["\r"], preview) is None
@@ -0,0 +1,152 @@
+import fcntl
+import threading
+from pathlib import Path
+
+import pytest
+from git import Actor, Repo
+
+from basethemes.foo import init_repo
+from basethemes.sync import (
+    sync_repo,
+    current_commit,
+    trees_dir_for,
+    publish_tree,
+)
+
+AUTHOR = Actor("test", "test@example.com")
+
+
+def commit_files(repo: Repo, files: dict[str, str]) -> str:
+    for name, content in files.items():
+        path = Path(repo.working_tree_dir) / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+    repo.index.add(list(files))
+    commit = repo.index.commit("update schemes", author=AUTHOR, committer=AUTHOR)
+
+    return commit.hexsha
+
+
+@pytest.fixture
+def upstream(tmp_path) -> tuple[Repo, str]:
+    """A working repo, and the url of a bare repo standing in for the upstream"""
+    work = Repo.init(tmp_path / "work")
+    commit_files(
+        work,
+        {
+            "base16/gotham.yaml": "name: Gotham\n",
+            "base24/gotham.yaml": "name: Gotham\n",
+            "base17/unused.yaml": "name: Unused\n",
+            "README.md": "schemes\n",
+        },
+    )
+
+    bare = tmp_path / "upstream.git"
+    work.clone(bare, bare=True)
+    work.create_remote("origin", str(bare))
+
+    return work, f"file://{bare}"
+
+
+def test_sparse_clone(tmp_path, upstream):
+    work, url = upstream
+    repo_dir = tmp_path / "schemes"
+
+    assert sync_repo(url, repo_dir)
+
+    assert repo_dir.is_symlink()
+    assert current_commit(repo_dir) == work.head.commit.hexsha
+    assert (repo_dir / "base16/gotham.yaml").is_file()
+    assert (repo_dir / "base24/gotham.yaml").is_file()
+    assert not (repo_dir / "base17").exists()
+
+    assert Repo(repo_dir).git.rev_list("--count", "HEAD") == "1"
+
+
+def test_sync_swaps_in_new_tree(tmp_path, upstream):
+    work, url = upstream
+    repo_dir = tmp_path / "schemes"
+
+    sync_repo(url, repo_dir)
+    first = current_commit(repo_dir)
+
+    assert not sync_repo(url, repo_dir)  # nothing new upstream
+
+    second = commit_files(work, {"base16/new.yaml": "name: New\n"})
+    work.remotes.origin.push(work.active_branch.name)
+
+    assert sync_repo(url, repo_dir)
+    assert current_commit(repo_dir) == second
+    assert (repo_dir / "base16/new.yaml").is_file()
+
+    # previous tree is kept for any readers still using it
+    assert (trees_dir_for(repo_dir) / first).is_dir()
+
+    third = commit_files(work, {"base16/newer.yaml": "name: Newer\n"})
+    work.remotes.origin.push(work.active_branch.name)
+
+    assert sync_repo(url, repo_dir)
+    assert current_commit(repo_dir) == third
+    assert not (trees_dir_for(repo_dir) / first).exists()
+
+
+def test_publish_refuses_unmanaged_dir(tmp_path):
+    repo_dir = tmp_path / "schemes"
+    repo_dir.mkdir()
+
+    with pytest.raises(FileExistsError, match="not managed by sync"):
+        publish_tree(repo_dir, tmp_path / "tree")
+
+
+def test_sync_adopts_plain_clone(tmp_path, upstream):
+    work, url = upstream
+    repo_dir = tmp_path / "schemes"
+    Repo.clone_from(url, repo_dir)
+
+    assert not sync_repo(url, repo_dir)  # already up to date once adopted
+
+    assert repo_dir.is_symlink()
+    assert current_commit(repo_dir) == work.head.commit.hexsha
+    assert (repo_dir / "base16/gotham.yaml").is_file()
+
+    second = commit_files(work, {"base16/new.yaml": "name: New\n"})
+    work.remotes.origin.push(work.active_branch.name)
+
+    assert sync_repo(url, repo_dir)
+    assert current_commit(repo_dir) == second
+
+
+def test_sync_refuses_unmanaged_dir_before_cloning(tmp_path, upstream):
+    _, url = upstream
+    repo_dir = tmp_path / "schemes"
+    repo_dir.mkdir()
+    (repo_dir / "notes.txt").write_text("local files\n")
+
+    with pytest.raises(FileExistsError, match="not a git repo managed by sync"):
+        sync_repo(url, repo_dir)
+
+    assert (repo_dir / "notes.txt").is_file()
+    assert list(trees_dir_for(repo_dir).iterdir()) == [
+        trees_dir_for(repo_dir) / ".lock"
+    ]
+
+
+def test_init_repo_waits_for_running_sync(tmp_path, upstream):
+    work, url = upstream
+    repo_dir = tmp_path / "schemes"
+    trees_dir = trees_dir_for(repo_dir)
+    trees_dir.mkdir()
+
+    repos = []
+    with open(trees_dir / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        thread = threading.Thread(target=lambda: repos.append(init_repo(url, repo_dir)))
+        thread.start()
+
+        thread.join(timeout=0.2)
+        assert thread.is_alive()  # blocked on the lock
+
+    thread.join()
+    (repo,) = repos
+    assert repo.head.commit.hexsha == work.head.commit.hexsha
@@ -0,0 +1,80 @@
+import json
+
+from basethemes import trace
+from basethemes.applier import NeoVimApplier
+from basethemes.trace import Tracer
+
+
+def test_disabled_records_nothing():
+    tracer = Tracer()
+
+    with tracer.span("noop"):
+        pass
+
+    assert tracer.spans == []
+
+
+def test_nested_spans():
+    tracer = Tracer()
+    tracer.enable()
+
+    with tracer.span("outer"):
+        with tracer.span("inner", file="kitty.conf"):
+            pass
+
+    inner, outer = tracer.spans
+    assert inner.name == "inner"
+    assert inner.args == {"file": "kitty.conf"}
+    assert outer.name == "outer"
+    assert outer.start <= inner.start
+    assert outer.duration >= inner.duration
+
+
+def test_span_recorded_on_error():
+    tracer = Tracer()
+    tracer.enable()
+
+    try:
+        with tracer.span("failing"):
+            raise ValueError("bad theme")
+    except ValueError:
+        pass
+
+    assert [span.name for span in tracer.spans] == ["failing"]
+
+
+def test_export_chrome_trace(tmp_path):
+    tracer = Tracer()
+    tracer.enable()
+
+    with tracer.span("apply_theme"):
+        pass
+
+    trace_file = tmp_path / "apply.trace.json"
+    tracer.export(trace_file, format="chrome")
+
+    (event,) = json.loads(trace_file.read_text())["traceEvents"]
+    assert event["name"] == "apply_theme"
+    assert event["ph"] == "X"
+    assert "allocated_blocks" in event["args"]
+
+
+def test_read_config_span_only_while_enabled(tmp_path):
+    config_file = tmp_path / "base16.lua"
+    config_file.write_text('local base16_theme = "default-dark"\n')
+    applier = NeoVimApplier(config_file=config_file)
+
+    trace.tracer.clear()
+    applier.read_config()
+    assert trace.tracer.spans == []
+
+    trace.enable()
+    try:
+        assert applier.read_config() == ['local base16_theme = "default-dark"\n']
+    finally:
+        trace.disable()
+
+    (span,) = trace.tracer.spans
+    assert span.name == "neovim.read_config"
+    assert span.args == {"file": config_file}
+    trace.tracer.clear()
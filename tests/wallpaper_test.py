@@ -0,0 +1,124 @@
+import struct
+import zlib
+from pathlib import Path
+
+import pytest
+from hypothesis import given, strategies as st
+
+from basethemes.wallpaper import dominant_colors, match_themes, read_image
+
+from . import _strats
+
+RED, BLUE, GREEN = (255, 0, 0), (0, 0, 255), (0, 255, 0)
+
+
+def halves(width: int, height: int) -> list[list[tuple[int, int, int]]]:
+    """Left half red, right half blue"""
+    return [
+        [RED if x < width // 2 else BLUE for x in range(width)] for _ in range(height)
+    ]
+
+
+def write_ppm(path: Path, rows: list[list[tuple[int, int, int]]]) -> None:
+    header = f"P6\n# comment\n{len(rows[0])} {len(rows)}\n255\n".encode()
+    path.write_bytes(header + bytes(c for row in rows for pixel in row for c in pixel))
+
+
+def _paeth(left: int, up: int, up_left: int) -> int:
+    estimate = left + up - up_left
+    distances = [abs(estimate - v) for v in (left, up, up_left)]
+    return (left, up, up_left)[distances.index(min(distances))]
+
+
+def write_png(path: Path, rows: list[list[tuple[int, int, int]]]) -> None:
+    """RGB png, cycling through every filter type row by row"""
+    width = len(rows[0])
+    raw = bytearray()
+    previous = bytes(width * 3)
+
+    for y, row in enumerate(rows):
+        current = bytes(c for pixel in row for c in pixel)
+        filter_type = y % 5
+        raw.append(filter_type)
+
+        for i, value in enumerate(current):
+            left = current[i - 3] if i >= 3 else 0
+            up_left = previous[i - 3] if i >= 3 else 0
+            predictor = [
+                0,
+                left,
+                previous[i],
+                (left + previous[i]) // 2,
+                _paeth(left, previous[i], up_left),
+            ][filter_type]
+            raw.append((value - predictor) & 0xFF)
+
+        previous = current
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        crc = zlib.crc32(kind + data)
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", crc)
+
+    path.write_bytes(
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, len(rows), 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(bytes(raw)))
+        + chunk(b"IEND", b"")
+    )
+
+
+@pytest.mark.parametrize("write_image", [write_ppm, write_png])
+def test_read_image(tmp_path, write_image):
+    rows = [
+        [((x * 7) % 256, (y * 13) % 256, (x * y) % 256) for x in range(10)]
+        for y in range(12)
+    ]
+    image = tmp_path / "image"
+    write_image(image, rows)
+
+    expected = [(r << 16) | (g << 8) | b for row in rows for r, g, b in row]
+    assert list(read_image(image, use_pillow=False)) == expected
+
+
+def test_read_image_samples(tmp_path):
+    image = tmp_path / "image.ppm"
+    write_ppm(image, halves(100, 100))
+
+    pixels = read_image(image, max_samples=100, use_pillow=False)
+    assert len(pixels) == 100
+    assert set(pixels) == {0xFF0000, 0x0000FF}
+
+
+@given(
+    pixels=st.lists(st.integers(min_value=0, max_value=0xFFFFFF), min_size=1),
+    num_colors=st.integers(min_value=1, max_value=8),
+)
+def test_dominant_color_weights(pixels: list[int], num_colors: int):
+    colors = dominant_colors(pixels, num_colors)
+
+    assert 1 <= len(colors) <= num_colors
+    assert sum(color.weight for color in colors) == pytest.approx(1)
+
+
+def accent_palette(accents: list[tuple[int, int, int]]) -> dict[str, str]:
+    palette = _strats.solid_palette("808080")
+    for key, accent in zip(["base08", "base0B", "base0D"], accents):
+        palette[key] = "#" + bytes(accent).hex()
+
+    return palette
+
+
+def test_match_themes(tmp_path):
+    image = tmp_path / "wallpaper.ppm"
+    write_ppm(image, halves(64, 64))
+
+    base_themes = _strats.make_themes(
+        [
+            _strats.make_theme("green", accent_palette([GREEN, GREEN, GREEN])),
+            _strats.make_theme("red and blue", accent_palette([RED, GREEN, BLUE])),
+        ]
+    )
+
+    (best, _), (worst, _) = match_themes(read_image(image), base_themes)
+    assert best.name == "red and blue"
+    assert worst.name == "green"
@@ -0,0 +1,114 @@
+import shutil
+import sys
+import threading
+import time
+
+import pytest
+
+from basethemes.foo import APPLIER_CONFIGS
+from basethemes.watch import ConfigWatcher
+
+from ._configs import write_config_root
+
+linux_only = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="inotify is Linux only"
+)
+
+
+@pytest.mark.parametrize("applier_type, config_file", APPLIER_CONFIGS)
+def test_is_current(tmp_path, theme, applier_type, config_file):
+    write_config_root(tmp_path, num_lines=10)
+
+    applier = applier_type(config_file=tmp_path / config_file)
+    rendered = applier.render(theme)
+    assert not applier.is_current(rendered)
+
+    applier.write_theme(theme, rendered=rendered)
+    assert applier_type(config_file=tmp_path / config_file).is_current(rendered)
+
+
+def test_check_only_reapplies_drifted(tmp_path, theme):
+    write_config_root(tmp_path)
+    watcher = ConfigWatcher(theme, config_dir=tmp_path, reload=False)
+
+    assert watcher.check() == ["lazyborder", "sketchybar", "neovim", "kitty"]
+    assert watcher.check() == []
+
+    write_config_root(tmp_path)
+    (tmp_path / "kitty/kitty.conf").write_text("")  # no longer themeable
+    assert watcher.check() == ["lazyborder", "sketchybar", "neovim"]
+
+    watcher.close()
+
+
+def wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+
+    return False
+
+
+@linux_only
+def test_watcher_reasserts_theme(tmp_path, theme):
+    write_config_root(tmp_path)
+    watcher = ConfigWatcher(theme, config_dir=tmp_path, reload=False, debounce=0.05)
+    thread = threading.Thread(target=watcher.run)
+    thread.start()
+
+    try:
+        borders = tmp_path / "borders/bordersrc"
+        themed = "active_color=0xffbbbbbb"
+        assert wait_for(lambda: themed in borders.read_text())
+
+        # overwritten in place
+        borders.write_text(borders.read_text().replace("bbbbbb", "123456"))
+        assert wait_for(lambda: themed in borders.read_text())
+
+        # replaced by renaming a new file over it
+        replacement = tmp_path / "borders/bordersrc.new"
+        replacement.write_text(borders.read_text().replace("bbbbbb", "654321"))
+        replacement.rename(borders)
+        assert wait_for(lambda: themed in borders.read_text())
+
+    finally:
+        watcher.stop()
+        thread.join(timeout=5)
+        watcher.close()
+
+    assert not thread.is_alive()
+
+
+@linux_only
+def test_watcher_skips_missing_configs(tmp_path, theme, capsys):
+    write_config_root(tmp_path)
+    # e.g. a Linux machine, without the macOS-only apps
+    shutil.rmtree(tmp_path / "borders")
+    shutil.rmtree(tmp_path / "sketchybar")
+
+    watcher = ConfigWatcher(theme, config_dir=tmp_path, reload=False, debounce=0.05)
+    assert "skipping lazyborder" in capsys.readouterr().err
+    thread = threading.Thread(target=watcher.run)
+    thread.start()
+
+    try:
+        kitty = tmp_path / "kitty/kitty.conf"
+        themed = "url_color #444444"
+        assert wait_for(lambda: themed in kitty.read_text())
+
+        kitty.write_text(kitty.read_text().replace("444444", "123456"))
+        assert wait_for(lambda: themed in kitty.read_text())
+
+    finally:
+        watcher.stop()
+        thread.join(timeout=5)
+        watcher.close()
+
+    assert not thread.is_alive()
+
+
+def test_watcher_without_configs(tmp_path, theme):
+    with pytest.raises(FileNotFoundError):
+        ConfigWatcher(theme, config_dir=tmp_path)
@@ -0,0 +1,63 @@
+from hypothesis import given, strategies as st
+
+from basethemes.base import Base16Palette, Base24Palette
+from basethemes.xterm import catalog_xterm_256, to_xterm_256
+
+from . import _strats
+
+# terminal colors in the order of Base16Palette._terminal_bases
+PRIMARIES = {
+    "base00": "#000000",
+    "base08": "#ff0000",
+    "base0B": "#00ff00",
+    "base0A": "#ffff00",
+    "base0D": "#0000ff",
+    "base0E": "#ff00ff",
+    "base0C": "#00ffff",
+    "base05": "#ffffff",
+}
+
+
+def test_primary_cube_matches_linear_ramp():
+    palette = Base16Palette(
+        **{f"base0{k}": "#808080" for k in "0123456789ABCDEF"} | PRIMARIES
+    )
+    colors = to_xterm_256(palette)
+
+    assert len(colors) == 256
+    assert str(colors[16]) == "#000000"
+    assert str(colors[231]) == "#FFFFFF"
+    assert str(colors[16 + 36 * 5]) == "#FF0000"
+    assert str(colors[16 + 36 * 1 + 6 * 2 + 3]) == "#336699"
+
+    grays = [color.hex for color in colors[232:]]
+    assert grays == sorted(grays)
+    assert all(color.red == color.green == color.blue for color in colors[232:])
+
+
+@given(palette=_strats.raw_scheme(24).map(lambda s: Base24Palette(**s["palette"])))
+def test_base24_terminal_colors(palette: Base24Palette):
+    terminal_colors = palette.to_terminal_colors()
+
+    assert terminal_colors[0] is palette["base00"]
+    assert terminal_colors[7] is palette["base06"]
+    assert terminal_colors[9] is palette["base12"]
+    assert terminal_colors[15] is palette["base07"]
+
+
+@given(schemes=st.lists(_strats.base16_scheme, min_size=1, max_size=4))
+def test_batch_matches_single(schemes: list[dict]):
+    base_themes = _strats.make_themes(
+        _strats.make_theme(str(n), scheme["palette"])
+        for n, scheme in enumerate(schemes)
+    )
+    batch = catalog_xterm_256(base_themes)
+
+    for name, theme in base_themes.themes.items():
+        single = to_xterm_256(theme.palette)
+        assert [color.hex for color in batch[name]] == [color.hex for color in single]
+
+        terminal_colors = theme.to_terminal_colors()
+        assert [c.hex for c in single[:16]] == [
+            terminal_colors[n].hex for n in range(16)
+        ]